@@ -3,12 +3,87 @@ Changes Diff Generator
 Extracts and summarizes review changes in a readable format.
 """
 
-import json
-from typing import Dict, List, Tuple
+import asyncio
+import hashlib
+import os
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from collections import defaultdict
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 
+from database import ReviewDatabase
+
+
+# Maps a stored change 'type' to the summary section it is reported under
+CHANGE_TYPE_BUCKETS = {
+    'spelling': 'spelling',
+    'grammar': 'grammar',
+    'style': 'style',
+    'table_issue': 'table_issues',
+    'figure_issue': 'table_issues',
+}
+
+# Sections that only show a handful of unique examples; the database can sample these
+# in SQL instead of loading every change
+EXAMPLE_ONLY_TYPES = ('spelling', 'style')
+MAX_EXAMPLES = 5
+
+
+# Single-scan classifier for grammar change reasons; group names are the categories
+_REASON_CATEGORY_RE = re.compile(r'(?P<whitespace>space)|(?P<punctuation>punctuation)', re.IGNORECASE)
+
+
+def grammar_category(reason: str) -> str:
+    """
+    Classify a grammar change by its reason text.
+
+    Returns:
+        'whitespace', 'punctuation', 'punctuation_spacing' (mentions both) or 'other'
+    """
+    found = {match.lastgroup for match in _REASON_CATEGORY_RE.finditer(reason)}
+    if len(found) == 2:
+        return 'punctuation_spacing'
+    return found.pop() if found else 'other'
+
+
+def _short_repr(text: Optional[str], limit: int = 80) -> str:
+    """repr() of a change string, truncated before escaping when it is long."""
+    if isinstance(text, str) and len(text) > limit:
+        return repr(text[:limit]) + '...'
+    return repr(text)
+
+
+@dataclass(slots=True)
+class ChangeRecord:
+    """A stored review change, reduced to the fields the diff summary reads."""
+    type: str
+    original: Optional[str] = None
+    corrected: Optional[str] = None
+    reason: Optional[str] = None
+    severity: Optional[str] = None
+    description: Optional[str] = None
+    category: Optional[str] = None
+    example_key: Tuple[Any, Any] = field(init=False)
+
+    def __post_init__(self):
+        # Dedup key used by _get_unique_examples
+        self.example_key = (self.original, self.corrected)
+
+    @classmethod
+    def from_dict(cls, change: Dict[str, Any]) -> 'ChangeRecord':
+        """Build a record from a change dict as stored in the reviews table."""
+        return cls(
+            type=change.get('type', 'unknown'),
+            original=change.get('original'),
+            corrected=change.get('corrected'),
+            reason=change.get('reason'),
+            severity=change.get('severity'),
+            description=change.get('description'),
+            category=change.get('category')
+        )
+
 
 class ChangesDiffGenerator:
     """Generates concise, readable diff summaries from review changes."""
@@ -19,8 +94,9 @@ class ChangesDiffGenerator:
         self.manual_review_time = config.get('output', {}).get('roi_metrics', {}).get(
             'manual_review_time_per_page', 5  # minutes per page default
         )
+        self.cache_summaries = config.get('output', {}).get('cache_diff_summary', False)
 
-    async def generate_diff_summary(self, db, document_id: str, stats: Dict,
+    async def generate_diff_summary(self, db: ReviewDatabase, document_id: str, stats: Dict,
                                    timing_data: Dict) -> str:
         """
         Generate a concise diff summary from database changes.
@@ -34,72 +110,132 @@ class ChangesDiffGenerator:
         Returns:
             Path to generated diff summary file
         """
-        # Extract changes from database
-        changes_by_type = await self._extract_changes(db, document_id)
+        # Single timestamp shared by the header and the output filename
+        generated_at = datetime.now()
+
+        output_path = self._output_path(document_id, generated_at)
+
+        # The review-derived sections can be reused while the document's reviews
+        # are unchanged; header, ROI and recommendations are always rendered fresh
+        cache_path = self._changes_cache_path(document_id)
+        cache_key = await self._changes_cache_key(db, document_id) if cache_path else None
+        cached = await self._read_changes_cache(cache_path, cache_key) if cache_path else None
+        if cached is not None:
+            change_lines = [cached] if cached else []
+        else:
+            # Extract changes from database
+            changes_by_type, counts_by_type = await self._extract_changes(db, document_id)
+            change_lines = self._iter_change_lines(changes_by_type, counts_by_type)
+
+            if cache_path:
+                # One file per document, overwritten when its reviews change
+                change_lines = list(change_lines)
+                await self._write_output([cache_key, *change_lines], cache_path)
+
+        # Sections are generated lazily and streamed straight to the output file
+        summary_lines = self._iter_summary_lines(change_lines, stats, timing_data, generated_at)
 
-        # Build the diff summary
-        summary_parts = []
+        # Write to file
+        await self._write_output(summary_lines, output_path)
 
-        # Header
-        summary_parts.append(self._generate_header(stats, timing_data))
+        return str(output_path)
 
-        # Sample changes by category
-        if changes_by_type['spelling']:
-            summary_parts.append(self._format_spelling_changes(changes_by_type['spelling']))
+    async def generate_diff_summaries(self, db: ReviewDatabase, documents: Dict[str, Tuple[Dict, Dict]],
+                                      concurrency: int = 8) -> Dict[str, str]:
+        """
+        Generate diff summaries for several documents concurrently.
 
-        if changes_by_type['grammar']:
-            summary_parts.append(self._format_grammar_changes(changes_by_type['grammar']))
+        Args:
+            db: Database connection
+            documents: Mapping of document_id to its (stats, timing_data)
+            concurrency: Maximum number of summaries generated at once
 
-        if changes_by_type['style']:
-            summary_parts.append(self._format_style_changes(changes_by_type['style']))
+        Returns:
+            Mapping of document_id to generated diff summary file path
+        """
+        semaphore = asyncio.Semaphore(concurrency)
 
-        if changes_by_type['table_issues']:
-            summary_parts.append(self._format_table_issues(changes_by_type['table_issues']))
+        async def generate_one(document_id: str, stats: Dict, timing_data: Dict) -> str:
+            async with semaphore:
+                return await self.generate_diff_summary(db, document_id, stats, timing_data)
+
+        paths = await asyncio.gather(*(
+            generate_one(document_id, stats, timing_data)
+            for document_id, (stats, timing_data) in documents.items()
+        ))
+        return dict(zip(documents, paths))
+
+    def _iter_summary_lines(self, change_lines: Iterable[str], stats: Dict, timing_data: Dict,
+                            generated_at: datetime) -> Iterator[str]:
+        """Yield the diff summary line by line, one section at a time."""
+        # Header
+        yield self._generate_header(stats, timing_data, generated_at)
+
+        # Sample changes by category
+        yield from change_lines
 
         # Cross-reference summary
         if stats.get('crossref'):
-            summary_parts.append(self._format_crossref_summary(stats['crossref']))
+            yield from self._format_crossref_summary(stats['crossref'])
 
         # ROI metrics
-        summary_parts.append(self._format_roi_metrics(stats, timing_data))
+        yield from self._format_roi_metrics(stats, timing_data)
 
         # Final recommendations
-        summary_parts.append(self._generate_recommendations(stats))
+        yield from self._generate_recommendations(stats)
 
-        # Combine all parts
-        full_summary = "\n".join(summary_parts)
+    def _iter_change_lines(self, changes_by_type: Dict[str, List[ChangeRecord]],
+                           counts_by_type: Dict[str, int]) -> Iterator[str]:
+        """Yield the sample-change sections, which depend only on the stored reviews."""
+        if counts_by_type['spelling']:
+            yield from self._format_spelling_changes(changes_by_type['spelling'],
+                                                     counts_by_type['spelling'])
 
-        # Write to file
-        output_path = self._write_output(full_summary, document_id)
+        if changes_by_type['grammar']:
+            yield from self._format_grammar_changes(changes_by_type['grammar'])
 
-        return str(output_path)
+        if counts_by_type['style']:
+            yield from self._format_style_changes(changes_by_type['style'],
+                                                  counts_by_type['style'])
+
+        if changes_by_type['table_issues']:
+            yield from self._format_table_issues(changes_by_type['table_issues'])
+
+    async def _extract_changes(self, db: ReviewDatabase,
+                               document_id: str) -> Tuple[Dict[str, List[ChangeRecord]], Dict[str, int]]:
+        """
+        Extract changes from database, grouped by type.
+
+        The database counts every change and samples the example-only types in
+        SQL, so spelling/style changes beyond their examples are never loaded.
 
-    async def _extract_changes(self, db, document_id: str) -> Dict[str, List]:
-        """Extract changes from database, grouped by type."""
+        Returns:
+            Tuple of (changes_by_type, counts_by_type). The example-only sections hold
+            just their unique examples; the counts always cover every change.
+        """
         changes_by_type = defaultdict(list)
+        counts_by_type = defaultdict(int)
 
-        # Get all reviews for this document
-        all_chunks = await db.get_all_chunks(document_id)
+        for change_type, count in (await db.get_change_counts_by_type(document_id)).items():
+            bucket = CHANGE_TYPE_BUCKETS.get(change_type or 'unknown')
+            if bucket:
+                counts_by_type[bucket] += count
 
-        for chunk in all_chunks:
-            review = await db.get_review(chunk.chunk_id)
-            if review and review.changes:
-                changes = json.loads(review.changes) if isinstance(review.changes, str) else review.changes
+        # Spelling/style only display examples: fetch the first unique ones
+        for change_type in EXAMPLE_ONLY_TYPES:
+            if counts_by_type[change_type]:
+                samples = await db.get_sample_changes(document_id, change_type, limit=MAX_EXAMPLES)
+                changes_by_type[change_type] = [ChangeRecord.from_dict(c) for c in samples]
 
-                for change in changes:
-                    change_type = change.get('type', 'unknown')
-                    if change_type == 'spelling':
-                        changes_by_type['spelling'].append(change)
-                    elif change_type == 'grammar':
-                        changes_by_type['grammar'].append(change)
-                    elif change_type == 'style':
-                        changes_by_type['style'].append(change)
-                    elif change_type in ['table_issue', 'figure_issue']:
-                        changes_by_type['table_issues'].append(change)
+        # Grammar and table/figure sections need every change for their breakdowns
+        full_types = [t for t, bucket in CHANGE_TYPE_BUCKETS.items() if bucket not in EXAMPLE_ONLY_TYPES]
+        for change in await db.get_changes_of_types(document_id, full_types):
+            record = ChangeRecord.from_dict(change)
+            changes_by_type[CHANGE_TYPE_BUCKETS[record.type]].append(record)
 
-        return changes_by_type
+        return changes_by_type, counts_by_type
 
-    def _generate_header(self, stats: Dict, timing_data: Dict) -> str:
+    def _generate_header(self, stats: Dict, timing_data: Dict, generated_at: datetime) -> str:
         """Generate document header."""
         doc_info = stats.get('document', {})
         proc_info = stats.get('processing', {})
@@ -107,7 +243,7 @@ class ChangesDiffGenerator:
         header = f"""# Review Changes Summary
 
 **Document:** {doc_info.get('filename', 'N/A')}
-**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+**Generated:** {generated_at.strftime('%Y-%m-%d %H:%M:%S')}
 **Total Changes:** {stats.get('language_review', {}).get('total_changes', 0):,}
 
 ---
@@ -125,37 +261,47 @@ class ChangesDiffGenerator:
 """
         return header
 
-    def _format_spelling_changes(self, changes: List[Dict]) -> str:
-        """Format spelling corrections."""
-        if not changes:
-            return ""
+    def _format_spelling_changes(self, changes: List[ChangeRecord], total: int) -> List[str]:
+        """Format spelling corrections (`total` counts all, `changes` may be a sample)."""
+        if not total:
+            return []
 
         # Get unique examples
-        examples = self._get_unique_examples(changes, max_examples=5)
+        examples = self._get_unique_examples(changes, max_examples=MAX_EXAMPLES)
 
         lines = ["## Spelling Corrections", ""]
-        lines.append(f"**Total:** {len(changes)} corrections\n")
+        lines.append(f"**Total:** {total} corrections\n")
 
         if examples:
             lines.append("**Examples:**")
             lines.append("```diff")
             for ex in examples:
-                lines.append(f"- {ex['original']}")
-                lines.append(f"+ {ex['corrected']}")
+                lines.append(f"- {ex.original}")
+                lines.append(f"+ {ex.corrected}")
             lines.append("```")
 
         lines.append("\n---\n")
-        return "\n".join(lines)
+        return lines
 
-    def _format_grammar_changes(self, changes: List[Dict]) -> str:
+    def _format_grammar_changes(self, changes: List[ChangeRecord]) -> List[str]:
         """Format grammar fixes."""
         if not changes:
-            return ""
-
-        # Categorize grammar changes
-        whitespace_fixes = [c for c in changes if 'space' in c.get('reason', '').lower()]
-        punctuation_fixes = [c for c in changes if 'punctuation' in c.get('reason', '').lower()]
-        other_fixes = [c for c in changes if c not in whitespace_fixes and c not in punctuation_fixes]
+            return []
+
+        # Categorize grammar changes in a single pass, using the category tagged at
+        # review time when present (older records only carry the reason text)
+        whitespace_fixes = []
+        punctuation_fixes = []
+        other_fixes = []
+        for c in changes:
+            category = c.category or grammar_category(c.reason or '')
+            # A punctuation-spacing fix is counted under both headings
+            if category in ('whitespace', 'punctuation_spacing'):
+                whitespace_fixes.append(c)
+            if category in ('punctuation', 'punctuation_spacing'):
+                punctuation_fixes.append(c)
+            if category == 'other':
+                other_fixes.append(c)
 
         lines = ["## Grammar & Formatting Fixes", ""]
         lines.append(f"**Total:** {len(changes)} fixes\n")
@@ -166,8 +312,8 @@ class ChangesDiffGenerator:
             if examples:
                 lines.append("```diff")
                 for ex in examples:
-                    orig_repr = repr(ex['original'])
-                    corr_repr = repr(ex['corrected'])
+                    orig_repr = _short_repr(ex.original)
+                    corr_repr = _short_repr(ex.corrected)
                     lines.append(f"- {orig_repr} (extra spaces)")
                     lines.append(f"+ {corr_repr} (single space)")
                 lines.append("```")
@@ -179,8 +325,8 @@ class ChangesDiffGenerator:
             if examples:
                 lines.append("```diff")
                 for ex in examples:
-                    lines.append(f"- {ex['original']}")
-                    lines.append(f"+ {ex['corrected']}")
+                    lines.append(f"- {ex.original}")
+                    lines.append(f"+ {ex.corrected}")
                 lines.append("```")
                 lines.append("")
 
@@ -188,39 +334,43 @@ class ChangesDiffGenerator:
             lines.append(f"**Other Grammar Fixes:** {len(other_fixes)}")
 
         lines.append("\n---\n")
-        return "\n".join(lines)
+        return lines
 
-    def _format_style_changes(self, changes: List[Dict]) -> str:
-        """Format style improvements."""
-        if not changes:
-            return ""
+    def _format_style_changes(self, changes: List[ChangeRecord], total: int) -> List[str]:
+        """Format style improvements (`total` counts all, `changes` may be a sample)."""
+        if not total:
+            return []
 
-        examples = self._get_unique_examples(changes, max_examples=5)
+        examples = self._get_unique_examples(changes, max_examples=MAX_EXAMPLES)
 
         lines = ["## Style Improvements", ""]
-        lines.append(f"**Total:** {len(changes)} improvements\n")
+        lines.append(f"**Total:** {total} improvements\n")
 
         if examples:
             lines.append("**Examples:**")
             lines.append("```diff")
             for ex in examples:
-                lines.append(f"- {ex['original']}")
-                lines.append(f"+ {ex['corrected']}")
-                lines.append(f"  # {ex.get('reason', 'Style improvement')}")
+                lines.append(f"- {ex.original}")
+                lines.append(f"+ {ex.corrected}")
+                lines.append(f"  # {ex.reason if ex.reason is not None else 'Style improvement'}")
             lines.append("```")
 
         lines.append("\n---\n")
-        return "\n".join(lines)
+        return lines
 
-    def _format_table_issues(self, issues: List[Dict]) -> str:
+    def _format_table_issues(self, issues: List[ChangeRecord]) -> List[str]:
         """Format table and figure issues."""
         if not issues:
-            return ""
+            return []
+
+        # Categorize by severity in a single pass
+        by_severity = defaultdict(list)
+        for issue in issues:
+            by_severity[issue.severity].append(issue)
 
-        # Categorize by severity
-        high_severity = [i for i in issues if i.get('severity') == 'high']
-        medium_severity = [i for i in issues if i.get('severity') == 'medium']
-        low_severity = [i for i in issues if i.get('severity') == 'low']
+        high_severity = by_severity['high']
+        medium_severity = by_severity['medium']
+        low_severity = by_severity['low']
 
         lines = ["## Tables & Figures Issues", ""]
         lines.append(f"**Total Issues:** {len(issues)}\n")
@@ -229,7 +379,7 @@ class ChangesDiffGenerator:
             lines.append(f"**High Severity:** {len(high_severity)}")
             examples = high_severity[:3]
             for ex in examples:
-                lines.append(f"  - {ex.get('description', 'Unknown issue')}")
+                lines.append(f"  - {ex.description if ex.description is not None else 'Unknown issue'}")
 
         if medium_severity:
             lines.append(f"**Medium Severity:** {len(medium_severity)}")
@@ -238,16 +388,16 @@ class ChangesDiffGenerator:
             lines.append(f"**Low Severity:** {len(low_severity)}")
 
         lines.append("\n---\n")
-        return "\n".join(lines)
+        return lines
 
-    def _format_crossref_summary(self, crossref: Dict) -> str:
+    def _format_crossref_summary(self, crossref: Dict) -> List[str]:
         """Format cross-reference validation summary."""
         total = crossref.get('total', 0)
         valid = crossref.get('valid', 0)
         invalid = crossref.get('invalid', 0)
 
         if total == 0:
-            return ""
+            return []
 
         validity_pct = (valid / total * 100) if total > 0 else 0
 
@@ -262,31 +412,32 @@ class ChangesDiffGenerator:
             lines.append("actually broken or just not detected by the validator.")
 
         lines.append("\n---\n")
-        return "\n".join(lines)
+        return lines
 
-    def _format_roi_metrics(self, stats: Dict, timing_data: Dict) -> str:
+    def _format_roi_metrics(self, stats: Dict, timing_data: Dict) -> List[str]:
         """Format ROI and time savings metrics."""
         total_pages = stats.get('document', {}).get('total_pages', 0)
         processing_time_minutes = timing_data.get('total_time', 0) / 60
 
         # Calculate estimated manual review time
         manual_time_minutes = total_pages * self.manual_review_time
+        manual_time_hours = manual_time_minutes / 60
         time_saved_minutes = manual_time_minutes - processing_time_minutes
         time_saved_hours = time_saved_minutes / 60
         efficiency_pct = (time_saved_minutes / manual_time_minutes * 100) if manual_time_minutes > 0 else 0
 
         lines = ["## ROI & Time Savings", ""]
         lines.append(f"**Automated Processing Time:** {processing_time_minutes:.1f} minutes")
-        lines.append(f"**Estimated Manual Review Time:** {manual_time_minutes:.0f} minutes ({manual_time_minutes/60:.1f} hours)")
+        lines.append(f"**Estimated Manual Review Time:** {manual_time_minutes:.0f} minutes ({manual_time_hours:.1f} hours)")
         lines.append(f"**Time Saved:** {time_saved_minutes:.0f} minutes ({time_saved_hours:.1f} hours)")
         lines.append(f"**Efficiency Gain:** {efficiency_pct:.0f}%")
         lines.append("")
-        lines.append(f"💡 **This review would have taken ~{manual_time_minutes/60:.1f} hours manually!**")
+        lines.append(f"💡 **This review would have taken ~{manual_time_hours:.1f} hours manually!**")
 
         lines.append("\n---\n")
-        return "\n".join(lines)
+        return lines
 
-    def _generate_recommendations(self, stats: Dict) -> str:
+    def _generate_recommendations(self, stats: Dict) -> List[str]:
         """Generate recommendations based on review results."""
         lines = ["## Recommendations", ""]
 
@@ -308,30 +459,72 @@ class ChangesDiffGenerator:
         lines.append("3. Accept/reject automated suggestions")
         lines.append("4. Run final quality check")
 
-        return "\n".join(lines)
+        return lines
 
-    def _get_unique_examples(self, changes: List[Dict], max_examples: int = 5) -> List[Dict]:
+    def _get_unique_examples(self, changes: List[ChangeRecord], max_examples: int = 5) -> List[ChangeRecord]:
         """Get unique change examples."""
-        seen = set()
-        unique = []
+        # Insertion-ordered dict keeps the first change seen for each key
+        unique = {}
 
         for change in changes:
-            key = (change.get('original'), change.get('corrected'))
-            if key not in seen:
-                seen.add(key)
-                unique.append(change)
-                if len(unique) >= max_examples:
-                    break
+            unique.setdefault(change.example_key, change)
+            if len(unique) >= max_examples:
+                break
 
-        return unique
+        return list(unique.values())
 
-    def _write_output(self, summary: str, document_id: str) -> Path:
-        """Write summary to file."""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_filename = f"changes_diff_{timestamp}.md"
-        output_path = self.output_dir / output_filename
+    def _changes_cache_path(self, document_id: str) -> Optional[Path]:
+        """
+        Cache file for a document's sample-change sections.
 
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(summary)
+        Returns:
+            Path, or None when caching is disabled
+        """
+        if not self.cache_summaries:
+            return None
+        return self.output_dir / '.diff_cache' / f"changes_{document_id}.md"
+
+    @staticmethod
+    async def _changes_cache_key(db: ReviewDatabase, document_id: str) -> str:
+        """Cache key for (document_id, review fingerprint), stored as the file's first line."""
+        fingerprint = await db.get_review_fingerprint(document_id)
+        return hashlib.sha256(f"{document_id}:{fingerprint}".encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    async def _read_changes_cache(cache_path: Path, cache_key: str) -> Optional[str]:
+        """
+        Read cached sample-change sections.
 
-        return output_path
+        Returns:
+            The cached text, or None when there is no entry for this cache key
+        """
+        if not cache_path.exists():
+            return None
+        text = await asyncio.to_thread(cache_path.read_text, encoding='utf-8')
+        key, _, cached = text.partition('\n')
+        return cached if key == cache_key else None
+
+    def _output_path(self, document_id: str, generated_at: datetime) -> Path:
+        """Timestamped output path for a summary."""
+        timestamp = generated_at.strftime('%Y%m%d_%H%M%S')
+        # Include the document ID so concurrent summaries never share a filename
+        return self.output_dir / f"changes_diff_{document_id}_{timestamp}.md"
+
+    async def _write_output(self, summary_lines: Iterable[str], output_path: Path):
+        """Stream summary lines to file without blocking the event loop."""
+        # Write to a temporary file first so a partial file is never picked up as a cache hit
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_path.with_suffix('.md.tmp')
+        await asyncio.to_thread(self._write_lines, tmp_path, summary_lines)
+        os.replace(tmp_path, output_path)
+
+    @staticmethod
+    def _write_lines(output_path: Path, lines: Iterable[str]):
+        """Write newline-separated lines as they are produced."""
+        # Binary mode: encode each line once and skip the TextIOWrapper layer
+        with open(output_path, 'wb') as f:
+            separator = b""
+            for line in lines:
+                f.write(separator)
+                f.write(line.encode('utf-8'))
+                separator = b"\n"
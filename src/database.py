@@ -4,12 +4,99 @@ Uses SQLite with async support for state management.
 """
 
 import aiosqlite
+import asyncio
+import contextvars
 import json
+import logging
+import numpy as np
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, AsyncIterator, Sequence, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+logger = logging.getLogger(__name__)
+
+
+# Connection tuning applied on every connect():
+# - 8 KiB pages fit a typical chunk/review row without overflow pages (only
+#   takes effect when the database file is created)
+# - WAL lets progress/summary readers run alongside review writes
+# - synchronous=NORMAL is crash-safe under WAL and skips the fsync on every commit
+# - a larger page cache (negative = KiB), in-memory temp tables and mmap'd reads
+# - busy_timeout waits for a competing writer instead of failing with "database is locked"
+_CONNECTION_PRAGMAS = (
+    "PRAGMA page_size=8192",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Reader connections only need the per-connection settings, and must never write
+_READER_PRAGMAS = (
+    "PRAGMA query_only=1",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16384",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Default number of read-only connections opened next to the writer
+DEFAULT_READER_CONNECTIONS = 4
+
+
+# Rows fetched per executor round-trip when streaming chunks with iter_chunks()
+CHUNK_FETCH_BATCH = 500
+
+# Max chunk IDs per "IN (...)" lookup (SQLite's default parameter limit is 999)
+ID_LOOKUP_BATCH = 900
+
+
+def _encode_embedding(embedding_vector) -> bytes:
+    """Pack an embedding as raw float32 bytes for BLOB storage."""
+    return np.asarray(embedding_vector, dtype=np.float32).tobytes()
+
+
+def _decode_embedding(value) -> np.ndarray:
+    """Unpack a stored embedding (float32 BLOB, or legacy JSON text) into a float32 array."""
+    if isinstance(value, str):
+        return np.asarray(_json_loads(value), dtype=np.float32)
+    return np.frombuffer(value, dtype=np.float32)
+
+
+# Top-level section of a chunk: section_hierarchy up to its first "." or space,
+# e.g. "3" for "3.2.1 Clock Sources", "Table" for "Table 4". Indexed as an
+# expression (idx_chunks_doc_section), so queries must use this exact text.
+_SECTION_ROOT_SQL = (
+    "substr(section_hierarchy, 1, "
+    "instr(replace(section_hierarchy, ' ', '.') || '.', '.') - 1)"
+)
+
+
+# Review of each chunk in a document (one per chunk), with the chunk's ordering columns.
+# Bind the document_id as the first parameter.
+_DOCUMENT_REVIEWS_CTE = """
+    WITH doc_reviews AS (
+        SELECT r.changes, c.page_start, c.chunk_id
+        FROM reviews r
+        JOIN chunks c ON r.chunk_id = c.chunk_id
+        WHERE c.document_id = ?
+    )
+"""
+
 
 class ReviewStatus(Enum):
     PENDING = "pending"
@@ -56,23 +143,152 @@ class CrossReference:
     page_number: int
 
 
+def _row_to_chunk(row) -> Chunk:
+    """Build a Chunk from a chunks row (SELECT * column order)."""
+    (chunk_id, document_id, content, page_start, page_end,
+     section_hierarchy, chunk_type, metadata, created_at) = row
+    return Chunk(chunk_id, document_id, content, page_start, page_end,
+                 section_hierarchy, chunk_type,
+                 _json_loads(metadata) if metadata else {}, created_at)
+
+
+def _row_to_review(row) -> ReviewRecord:
+    """Build a ReviewRecord from a reviews row (SELECT * column order)."""
+    (review_id, chunk_id, status, original_content, reviewed_content,
+     changes, confidence_score, reviewer, created_at, updated_at) = row
+    return ReviewRecord(review_id, chunk_id, status, original_content,
+                        reviewed_content, _json_loads(changes), confidence_score,
+                        reviewer, created_at, updated_at)
+
+
+def _row_to_crossref(row) -> CrossReference:
+    """Build a CrossReference from a cross_references row (SELECT * column order)."""
+    ref_id, chunk_id, reference_text, reference_type, target_id, is_valid, page_number = row
+    return CrossReference(ref_id, chunk_id, reference_text, reference_type,
+                          target_id, bool(is_valid), page_number)
+
+
 class ReviewDatabase:
     """Manages the SQLite database for review state."""
 
-    def __init__(self, db_path: str = "review_state.db"):
+    def __init__(self, db_path: str = "review_state.db",
+                 reader_connections: int = DEFAULT_READER_CONNECTIONS):
         self.db_path = db_path
+        # Writer connection: every insert_*/update_* goes through it
         self.conn = None
+        # Under WAL, read-only connections run get_*/has_* queries alongside the
+        # writer. An in-memory database is private to one connection, so it has none.
+        self.reader_connections = 0 if db_path == ":memory:" else max(0, reader_connections)
+        self._readers: List[aiosqlite.Connection] = []
+        self._idle_readers: Optional[asyncio.Queue] = None
+        # Serializes writers on the shared writer connection: held by every
+        # write for its statements and commit, and by transaction() for its
+        # whole block, so concurrent coroutines never interleave in one
+        # transaction
+        self._write_lock = asyncio.Lock()
+        # True in the context (coroutine, and tasks it spawns) that owns the
+        # open transaction(); its writes join it instead of taking the lock
+        self._in_transaction = contextvars.ContextVar(f"review_db_transaction_{id(self)}",
+                                                      default=False)
+        # False when this SQLite build lacks FTS5 (search_chunks then scans with LIKE)
+        self.fts_enabled = True
 
     async def connect(self):
-        """Establish database connection."""
+        """Establish the writer connection, create tables, then open the readers."""
         self.conn = await aiosqlite.connect(self.db_path)
+        for pragma in _CONNECTION_PRAGMAS:
+            await self.conn.execute(pragma)
         await self._create_tables()
 
+        self._idle_readers = asyncio.Queue()
+        for _ in range(self.reader_connections):
+            reader = await aiosqlite.connect(self.db_path)
+            for pragma in _READER_PRAGMAS:
+                await reader.execute(pragma)
+            self._readers.append(reader)
+            self._idle_readers.put_nowait(reader)
+
     async def close(self):
-        """Close database connection."""
+        """Close the reader and writer connections."""
+        for reader in self._readers:
+            await reader.close()
+        self._readers = []
+        self._idle_readers = None
         if self.conn:
             await self.conn.close()
 
+    @asynccontextmanager
+    async def _reader(self):
+        """
+        Borrow a read-only connection for one query.
+
+        Writes commit before returning, so readers always see them. Falls back
+        to the writer connection when no readers are open.
+        """
+        if not self._readers:
+            yield self.conn
+            return
+
+        reader = await self._idle_readers.get()
+        try:
+            yield reader
+        finally:
+            self._idle_readers.put_nowait(reader)
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Group writes into one transaction, committed once on exit.
+
+        Write methods called inside the block skip their own commit, so a loop
+        of N inserts/updates pays for one commit instead of N. An exception
+        rolls the whole block back. Nested blocks join the outer transaction.
+        Writes from other coroutines wait until the block exits. Reads go
+        through the reader connections and only see the block's writes after
+        it exits.
+
+        Usage:
+            async with db.transaction():
+                for ref in refs:
+                    await db.update_crossref_validity(ref.ref_id, ref.is_valid)
+        """
+        if self._in_transaction.get():
+            yield
+            return
+
+        async with self._write_lock:
+            await self.conn.execute("BEGIN IMMEDIATE")
+            token = self._in_transaction.set(True)
+            try:
+                yield
+            except BaseException:
+                await self.conn.rollback()
+                raise
+            else:
+                await self.conn.commit()
+            finally:
+                self._in_transaction.reset(token)
+
+    @asynccontextmanager
+    async def _write(self):
+        """
+        Run one write method's statements and commit them.
+
+        Inside this coroutine's own transaction() the statements join it and
+        the commit is left to the block's exit.
+        """
+        if self._in_transaction.get():
+            yield
+            return
+
+        async with self._write_lock:
+            try:
+                yield
+            except BaseException:
+                await self.conn.rollback()
+                raise
+            await self.conn.commit()
+
     async def _create_tables(self):
         """Create database tables if they don't exist."""
 
@@ -141,242 +357,644 @@ class ReviewDatabase:
             CREATE TABLE IF NOT EXISTS embeddings (
                 embedding_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 chunk_id TEXT NOT NULL,
-                embedding_vector TEXT NOT NULL,
+                embedding_vector BLOB NOT NULL,
                 embedding_model TEXT NOT NULL,
                 created_at TEXT,
                 FOREIGN KEY (chunk_id) REFERENCES chunks (chunk_id)
             )
         """)
 
+        # Indexes for the per-document joins: chunks in document order, a chunk's
+        # review (see _ensure_one_review_per_chunk), and its crossrefs
+        await self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_chunks_document
+            ON chunks (document_id, page_start, chunk_id)
+        """)
+        await self.conn.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_chunks_doc_section
+            ON chunks (document_id, {_SECTION_ROOT_SQL}, page_start, chunk_id)
+        """)
+        await self._ensure_one_review_per_chunk()
+        await self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_cross_references_chunk_id
+            ON cross_references (chunk_id)
+        """)
+
         # NEW: Index for faster embedding lookups
         await self.conn.execute("""
             CREATE INDEX IF NOT EXISTS idx_embeddings_chunk_id
             ON embeddings (chunk_id)
         """)
 
+        await self._ensure_chunk_fts()
+
         await self.conn.commit()
 
+    async def _ensure_one_review_per_chunk(self):
+        """
+        Keep exactly one (the current) review per chunk.
+
+        A unique index on reviews.chunk_id makes insert_review's INSERT OR REPLACE
+        swap out the chunk's previous review, so lookups need no ORDER BY/LIMIT
+        and no per-chunk deduplication. Databases created before the index may
+        hold superseded reviews; all but the latest per chunk are moved to the
+        append-only reviews_history table, not deleted.
+        """
+        await self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS reviews_history (
+                review_id TEXT PRIMARY KEY,
+                chunk_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                original_content TEXT NOT NULL,
+                reviewed_content TEXT,
+                changes TEXT,
+                confidence_score REAL,
+                reviewer TEXT,
+                created_at TEXT,
+                updated_at TEXT,
+                archived_at TEXT
+            )
+        """)
+
+        async with self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_reviews_chunk_id'"
+        ) as cursor:
+            if await cursor.fetchone():
+                return
+
+        await self.conn.execute("""
+            CREATE TEMP TABLE superseded_reviews AS
+            SELECT rowid AS review_rowid FROM (
+                SELECT rowid, ROW_NUMBER() OVER (
+                    PARTITION BY chunk_id ORDER BY updated_at DESC
+                ) AS rn
+                FROM reviews
+            )
+            WHERE rn > 1
+        """)
+        await self.conn.execute("""
+            INSERT OR REPLACE INTO reviews_history (review_id, chunk_id, status, original_content,
+                                                    reviewed_content, changes, confidence_score,
+                                                    reviewer, created_at, updated_at, archived_at)
+            SELECT review_id, chunk_id, status, original_content, reviewed_content, changes,
+                   confidence_score, reviewer, created_at, updated_at, ?
+            FROM reviews
+            WHERE rowid IN (SELECT review_rowid FROM superseded_reviews)
+        """, (datetime.now().isoformat(),))
+        cursor = await self.conn.execute("""
+            DELETE FROM reviews
+            WHERE rowid IN (SELECT review_rowid FROM superseded_reviews)
+        """)
+        if cursor.rowcount > 0:
+            logger.info("Moved %d superseded reviews to reviews_history", cursor.rowcount)
+        await self.conn.execute("DROP TABLE superseded_reviews")
+
+        await self.conn.execute("""
+            CREATE UNIQUE INDEX idx_reviews_chunk_id
+            ON reviews (chunk_id)
+        """)
+
+    async def _ensure_chunk_fts(self):
+        """
+        Keep an FTS5 full-text index over chunks.content for search_chunks().
+
+        chunks_fts is an external-content table (the text lives only in chunks)
+        kept in sync by triggers. An index created on an existing database is
+        rebuilt from the chunks already stored.
+        """
+        async with self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunks_fts'"
+        ) as cursor:
+            if await cursor.fetchone():
+                return
+
+        try:
+            await self.conn.execute("""
+                CREATE VIRTUAL TABLE chunks_fts USING fts5(
+                    content, chunk_id UNINDEXED,
+                    content='chunks', content_rowid='rowid',
+                    tokenize='porter unicode61'
+                )
+            """)
+        except aiosqlite.OperationalError:
+            # SQLite compiled without FTS5
+            self.fts_enabled = False
+            return
+
+        await self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+                INSERT INTO chunks_fts (rowid, content, chunk_id)
+                VALUES (new.rowid, new.content, new.chunk_id);
+            END
+        """)
+        await self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+                INSERT INTO chunks_fts (chunks_fts, rowid, content, chunk_id)
+                VALUES ('delete', old.rowid, old.content, old.chunk_id);
+            END
+        """)
+        await self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS chunks_au AFTER UPDATE ON chunks BEGIN
+                INSERT INTO chunks_fts (chunks_fts, rowid, content, chunk_id)
+                VALUES ('delete', old.rowid, old.content, old.chunk_id);
+                INSERT INTO chunks_fts (rowid, content, chunk_id)
+                VALUES (new.rowid, new.content, new.chunk_id);
+            END
+        """)
+        await self.conn.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('rebuild')")
+
     # Chunk operations
     async def insert_chunk(self, chunk: Chunk):
         """Insert a new chunk into the database."""
-        await self.conn.execute("""
-            INSERT INTO chunks (chunk_id, document_id, content, page_start, page_end,
-                              section_hierarchy, chunk_type, metadata, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            chunk.chunk_id, chunk.document_id, chunk.content, chunk.page_start,
-            chunk.page_end, chunk.section_hierarchy, chunk.chunk_type,
-            json.dumps(chunk.metadata), chunk.created_at
-        ))
-        await self.conn.commit()
+        await self.insert_chunks([chunk])
+
+    async def insert_chunks(self, chunks: List[Chunk]):
+        """Insert many chunks with one executemany and a single commit."""
+        async with self._write():
+            await self.conn.executemany("""
+                INSERT INTO chunks (chunk_id, document_id, content, page_start, page_end,
+                                  section_hierarchy, chunk_type, metadata, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (
+                    chunk.chunk_id, chunk.document_id, chunk.content, chunk.page_start,
+                    chunk.page_end, chunk.section_hierarchy, chunk.chunk_type,
+                    _json_dumps(chunk.metadata), chunk.created_at
+                )
+                for chunk in chunks
+            ])
 
     async def get_chunk(self, chunk_id: str) -> Optional[Chunk]:
         """Retrieve a chunk by ID."""
-        async with self.conn.execute(
+        async with self._reader() as conn, conn.execute(
             "SELECT * FROM chunks WHERE chunk_id = ?", (chunk_id,)
         ) as cursor:
             row = await cursor.fetchone()
             if row:
-                return Chunk(
-                    chunk_id=row[0],
-                    document_id=row[1],
-                    content=row[2],
-                    page_start=row[3],
-                    page_end=row[4],
-                    section_hierarchy=row[5],
-                    chunk_type=row[6],
-                    metadata=json.loads(row[7]),
-                    created_at=row[8]
-                )
+                return _row_to_chunk(row)
         return None
 
+    async def get_chunks_by_ids(self, chunk_ids: Sequence[str]) -> List[Chunk]:
+        """
+        Retrieve many chunks by ID with one query per ID_LOOKUP_BATCH IDs.
+
+        Returns:
+            Chunks in the order of chunk_ids (unknown IDs are skipped)
+        """
+        by_id = {}
+        for start in range(0, len(chunk_ids), ID_LOOKUP_BATCH):
+            batch = chunk_ids[start:start + ID_LOOKUP_BATCH]
+            placeholders = ", ".join("?" for _ in batch)
+            async with self._reader() as conn, conn.execute(
+                f"SELECT * FROM chunks WHERE chunk_id IN ({placeholders})", tuple(batch)
+            ) as cursor:
+                rows = await cursor.fetchall()
+            for row in rows:
+                chunk = _row_to_chunk(row)
+                by_id[chunk.chunk_id] = chunk
+
+        return [by_id[chunk_id] for chunk_id in chunk_ids if chunk_id in by_id]
+
     async def get_all_chunks(self, document_id: str) -> List[Chunk]:
         """Get all chunks for a document."""
-        chunks = []
-        async with self.conn.execute(
+        # fetchall() is one executor round-trip; `async for` costs one per row
+        async with self._reader() as conn, conn.execute(
             "SELECT * FROM chunks WHERE document_id = ? ORDER BY page_start, chunk_id",
             (document_id,)
         ) as cursor:
-            async for row in cursor:
-                chunks.append(Chunk(
-                    chunk_id=row[0],
-                    document_id=row[1],
-                    content=row[2],
-                    page_start=row[3],
-                    page_end=row[4],
-                    section_hierarchy=row[5],
-                    chunk_type=row[6],
-                    metadata=json.loads(row[7]),
-                    created_at=row[8]
-                ))
-        return chunks
+            rows = await cursor.fetchall()
+
+        return [_row_to_chunk(row) for row in rows]
+
+    async def iter_chunks(self, document_id: str,
+                          batch_size: int = CHUNK_FETCH_BATCH) -> AsyncIterator[Chunk]:
+        """
+        Stream a document's chunks in get_all_chunks() order.
+
+        Chunks are read batch_size at a time as keyset pages after the last
+        (page_start, chunk_id) seen, so only one batch of Chunk objects is alive
+        at once and the first chunk arrives before the rest are read. A reader
+        is borrowed per batch and returned before any chunk is yielded, so the
+        loop body can run its own queries.
+
+        Usage:
+            async for chunk in db.iter_chunks(document_id):
+                ...
+        """
+        async with self._reader() as conn, conn.execute(
+            "SELECT * FROM chunks WHERE document_id = ? ORDER BY page_start, chunk_id LIMIT ?",
+            (document_id, batch_size)
+        ) as cursor:
+            rows = await cursor.fetchall()
+
+        while rows:
+            for row in rows:
+                yield _row_to_chunk(row)
+            if len(rows) < batch_size:
+                break
+
+            last = rows[-1]
+            async with self._reader() as conn, conn.execute("""
+                SELECT * FROM chunks
+                WHERE document_id = ? AND (page_start, chunk_id) > (?, ?)
+                ORDER BY page_start, chunk_id
+                LIMIT ?
+            """, (document_id, last[3], last[0], batch_size)) as cursor:
+                rows = await cursor.fetchall()
+
+    async def get_chunks_by_metadata(self, document_id: str, key: str,
+                                     value: Any) -> List[Chunk]:
+        """
+        Get a document's chunks whose metadata[key] equals value.
+
+        The filter runs in SQLite via json_each, so non-matching chunks are
+        never decoded in Python. The key is compared as a plain string (never
+        parsed as a JSON path), so any key is safe to pass.
+
+        Args:
+            document_id: Document identifier
+            key: Top-level metadata key (e.g. 'extraction_quality')
+            value: Scalar to match (str, int, float, bool or None); booleans
+                compare as 0/1 like JSON1 returns them
+
+        Returns:
+            Matching chunks ordered like get_all_chunks()
+
+        Raises:
+            TypeError: If value is a dict or list (JSON1 returns nested values
+                as JSON text, so they cannot be matched reliably)
+        """
+        if isinstance(value, (dict, list, tuple)):
+            raise TypeError(f"Metadata value for {key!r} must be a scalar, not {type(value).__name__}")
+
+        async with self._reader() as conn, conn.execute("""
+            SELECT * FROM chunks
+            WHERE document_id = ? AND EXISTS (
+                SELECT 1 FROM json_each(chunks.metadata) AS m
+                WHERE m.key = ? AND m.value IS ?
+            )
+            ORDER BY page_start, chunk_id
+        """, (document_id, key, value)) as cursor:
+            rows = await cursor.fetchall()
+
+        return [_row_to_chunk(row) for row in rows]
+
+    async def get_chunks_by_section(self, document_id: str, section_root: str) -> List[Chunk]:
+        """
+        Get a document's chunks under one top-level section, in one index seek.
+
+        Args:
+            document_id: Document identifier
+            section_root: Top-level section number (e.g. '3' matches '3.0 ...'
+                and '3.2.1 ...'), or the leading word of unnumbered sections
+
+        Returns:
+            Matching chunks ordered like get_all_chunks()
+        """
+        async with self._reader() as conn, conn.execute(f"""
+            SELECT * FROM chunks
+            WHERE document_id = ? AND {_SECTION_ROOT_SQL} = ?
+            ORDER BY page_start, chunk_id
+        """, (document_id, section_root)) as cursor:
+            rows = await cursor.fetchall()
+
+        return [_row_to_chunk(row) for row in rows]
+
+    async def search_chunks(self, query: str, k: int = 10,
+                            document_id: Optional[str] = None) -> List[str]:
+        """
+        Full-text search over chunk content, best matches first.
+
+        Args:
+            query: FTS5 query (e.g. 'oscillator', '"brown-out reset"', 'ADC NEAR(clock)')
+            k: Maximum number of chunk IDs to return
+            document_id: Restrict the search to one document
+
+        Returns:
+            Chunk IDs ranked by BM25 (document order when FTS5 is unavailable,
+            in which case the query is matched as a plain substring)
+        """
+        if not self.fts_enabled:
+            sql = """
+                SELECT chunk_id FROM chunks
+                WHERE content LIKE '%' || ?1 || '%' AND (?2 IS NULL OR document_id = ?2)
+                ORDER BY page_start, chunk_id
+                LIMIT ?3
+            """
+        else:
+            # MATCH against the table name (not a column) so the FTS index is used
+            sql = """
+                SELECT chunks_fts.chunk_id FROM chunks_fts
+                JOIN chunks c ON c.rowid = chunks_fts.rowid
+                WHERE chunks_fts MATCH ?1 AND (?2 IS NULL OR c.document_id = ?2)
+                ORDER BY chunks_fts.rank
+                LIMIT ?3
+            """
+        async with self._reader() as conn, conn.execute(sql, (query, document_id, k)) as cursor:
+            rows = await cursor.fetchall()
+        return [row[0] for row in rows]
 
     # Review operations
     async def insert_review(self, review: ReviewRecord):
-        """Insert or update a review record."""
-        await self.conn.execute("""
-            INSERT OR REPLACE INTO reviews (review_id, chunk_id, status, original_content,
-                                           reviewed_content, changes, confidence_score,
-                                           reviewer, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            review.review_id, review.chunk_id, review.status, review.original_content,
-            review.reviewed_content, json.dumps(review.changes), review.confidence_score,
-            review.reviewer, review.created_at, review.updated_at
-        ))
-        await self.conn.commit()
+        """Insert a review record, replacing the chunk's previous review."""
+        await self.insert_reviews([review])
+
+    async def insert_reviews(self, reviews: List[ReviewRecord]):
+        """Insert many review records (one per chunk) with a single commit."""
+        async with self._write():
+            await self.conn.executemany("""
+                INSERT OR REPLACE INTO reviews (review_id, chunk_id, status, original_content,
+                                               reviewed_content, changes, confidence_score,
+                                               reviewer, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (
+                    review.review_id, review.chunk_id, review.status, review.original_content,
+                    review.reviewed_content, _json_dumps(review.changes), review.confidence_score,
+                    review.reviewer, review.created_at, review.updated_at
+                )
+                for review in reviews
+            ])
 
     async def get_review(self, chunk_id: str) -> Optional[ReviewRecord]:
         """Get review for a chunk."""
-        async with self.conn.execute(
-            "SELECT * FROM reviews WHERE chunk_id = ? ORDER BY updated_at DESC LIMIT 1",
+        async with self._reader() as conn, conn.execute(
+            "SELECT * FROM reviews WHERE chunk_id = ?",
             (chunk_id,)
         ) as cursor:
             row = await cursor.fetchone()
             if row:
-                return ReviewRecord(
-                    review_id=row[0],
-                    chunk_id=row[1],
-                    status=row[2],
-                    original_content=row[3],
-                    reviewed_content=row[4],
-                    changes=json.loads(row[5]),
-                    confidence_score=row[6],
-                    reviewer=row[7],
-                    created_at=row[8],
-                    updated_at=row[9]
-                )
+                return _row_to_review(row)
         return None
 
+    async def get_reviews_by_chunks(self, chunk_ids: Sequence[str]) -> Dict[str, ReviewRecord]:
+        """
+        Get the reviews of many chunks with one query per ID_LOOKUP_BATCH IDs.
+
+        Returns:
+            Dict mapping chunk ID to its review (chunks without one are absent)
+        """
+        reviews = {}
+        for start in range(0, len(chunk_ids), ID_LOOKUP_BATCH):
+            batch = chunk_ids[start:start + ID_LOOKUP_BATCH]
+            placeholders = ", ".join("?" for _ in batch)
+            async with self._reader() as conn, conn.execute(
+                f"SELECT * FROM reviews WHERE chunk_id IN ({placeholders})", tuple(batch)
+            ) as cursor:
+                rows = await cursor.fetchall()
+            for row in rows:
+                review = _row_to_review(row)
+                reviews[review.chunk_id] = review
+
+        return reviews
+
+    async def get_reviews_for_document(self, document_id: str) -> List[ReviewRecord]:
+        """
+        Get the review of every chunk of a document in one query.
+
+        Returns:
+            List of ReviewRecord objects ordered like get_all_chunks()
+        """
+        async with self._reader() as conn, conn.execute("""
+            SELECT r.review_id, r.chunk_id, r.status, r.original_content,
+                   r.reviewed_content, r.changes, r.confidence_score,
+                   r.reviewer, r.created_at, r.updated_at
+            FROM reviews r
+            JOIN chunks c ON r.chunk_id = c.chunk_id
+            WHERE c.document_id = ?
+            ORDER BY c.page_start, c.chunk_id
+        """, (document_id,)) as cursor:
+            rows = await cursor.fetchall()
+
+        return [_row_to_review(row) for row in rows]
+
+    async def get_review_fingerprint(self, document_id: str) -> str:
+        """
+        Cheap fingerprint of a document's reviews (count and latest update time).
+
+        Changes whenever a review for the document is added or updated.
+        """
+        async with self._reader() as conn, conn.execute("""
+            SELECT COUNT(r.review_id), MAX(r.updated_at)
+            FROM reviews r
+            JOIN chunks c ON r.chunk_id = c.chunk_id
+            WHERE c.document_id = ?
+        """, (document_id,)) as cursor:
+            row = await cursor.fetchone()
+        return f"{row[0]}:{row[1]}"
+
+    async def get_change_counts_by_type(self, document_id: str) -> Dict[str, int]:
+        """
+        Count review changes per change type for a document, in SQL.
+
+        Each chunk's current review is counted (reviews holds one per chunk).
+
+        Returns:
+            Dict mapping change type to number of changes
+        """
+        async with self._reader() as conn, conn.execute(f"""
+            {_DOCUMENT_REVIEWS_CTE}
+            SELECT json_extract(j.value, '$.type') AS change_type, COUNT(*)
+            FROM doc_reviews, json_each(doc_reviews.changes) AS j
+            GROUP BY change_type
+        """, (document_id,)) as cursor:
+            rows = await cursor.fetchall()
+        return dict(rows)
+
+    async def get_sample_changes(self, document_id: str, change_type: str,
+                                 limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Get the first unique (original, corrected) changes of one type, in SQL.
+
+        Args:
+            document_id: Document identifier
+            change_type: Change type to sample (e.g. 'spelling')
+            limit: Maximum number of samples to return
+
+        Returns:
+            Up to `limit` change dicts in document order
+        """
+        async with self._reader() as conn, conn.execute(f"""
+            {_DOCUMENT_REVIEWS_CTE},
+            typed AS (
+                SELECT j.value AS change,
+                       json_extract(j.value, '$.original') AS original,
+                       json_extract(j.value, '$.corrected') AS corrected,
+                       ROW_NUMBER() OVER (
+                           ORDER BY doc_reviews.page_start, doc_reviews.chunk_id, j.key
+                       ) AS ord
+                FROM doc_reviews, json_each(doc_reviews.changes) AS j
+                WHERE json_extract(j.value, '$.type') = ?
+            )
+            SELECT change FROM typed
+            WHERE ord IN (SELECT MIN(ord) FROM typed GROUP BY original, corrected)
+            ORDER BY ord
+            LIMIT ?
+        """, (document_id, change_type, limit)) as cursor:
+            rows = await cursor.fetchall()
+        return [_json_loads(row[0]) for row in rows]
+
+    async def get_changes_of_types(self, document_id: str,
+                                   change_types: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get every change of the given types for a document, in document order.
+
+        Changes of other types are filtered out in SQL and never decoded.
+        """
+        placeholders = ", ".join("?" for _ in change_types)
+        async with self._reader() as conn, conn.execute(f"""
+            {_DOCUMENT_REVIEWS_CTE}
+            SELECT j.value
+            FROM doc_reviews, json_each(doc_reviews.changes) AS j
+            WHERE json_extract(j.value, '$.type') IN ({placeholders})
+            ORDER BY doc_reviews.page_start, doc_reviews.chunk_id, j.key
+        """, (document_id, *change_types)) as cursor:
+            rows = await cursor.fetchall()
+        return [_json_loads(row[0]) for row in rows]
+
     async def get_pending_reviews(self, document_id: str) -> List[str]:
         """Get chunk IDs with pending reviews."""
-        chunk_ids = []
-        async with self.conn.execute("""
+        async with self._reader() as conn, conn.execute("""
             SELECT c.chunk_id FROM chunks c
             LEFT JOIN reviews r ON c.chunk_id = r.chunk_id
             WHERE c.document_id = ? AND (r.status IS NULL OR r.status = 'pending')
             ORDER BY c.page_start, c.chunk_id
         """, (document_id,)) as cursor:
-            async for row in cursor:
-                chunk_ids.append(row[0])
-        return chunk_ids
+            rows = await cursor.fetchall()
+        return [row[0] for row in rows]
 
     # Cross-reference operations
     async def insert_cross_reference(self, crossref: CrossReference):
         """Insert a cross-reference."""
-        await self.conn.execute("""
-            INSERT INTO cross_references (ref_id, chunk_id, reference_text, reference_type,
-                                         target_id, is_valid, page_number)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            crossref.ref_id, crossref.chunk_id, crossref.reference_text,
-            crossref.reference_type, crossref.target_id, crossref.is_valid,
-            crossref.page_number
-        ))
-        await self.conn.commit()
+        await self.insert_cross_references([crossref])
+
+    async def insert_cross_references(self, crossrefs: List[CrossReference]):
+        """Insert many cross-references with a single commit."""
+        if not crossrefs:
+            return
+        async with self._write():
+            await self.conn.executemany("""
+                INSERT INTO cross_references (ref_id, chunk_id, reference_text, reference_type,
+                                             target_id, is_valid, page_number)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (
+                    crossref.ref_id, crossref.chunk_id, crossref.reference_text,
+                    crossref.reference_type, crossref.target_id, crossref.is_valid,
+                    crossref.page_number
+                )
+                for crossref in crossrefs
+            ])
 
     async def get_cross_references(self, document_id: str) -> List[CrossReference]:
-        """Get all cross-references for a document."""
-        crossrefs = []
-        async with self.conn.execute("""
+        """Get all cross-references for a document, in insertion order."""
+        async with self._reader() as conn, conn.execute("""
             SELECT cr.* FROM cross_references cr
             JOIN chunks c ON cr.chunk_id = c.chunk_id
             WHERE c.document_id = ?
+            ORDER BY cr.rowid
         """, (document_id,)) as cursor:
-            async for row in cursor:
-                crossrefs.append(CrossReference(
-                    ref_id=row[0],
-                    chunk_id=row[1],
-                    reference_text=row[2],
-                    reference_type=row[3],
-                    target_id=row[4],
-                    is_valid=bool(row[5]),
-                    page_number=row[6]
-                ))
-        return crossrefs
+            rows = await cursor.fetchall()
+
+        return [_row_to_crossref(row) for row in rows]
 
     async def update_crossref_validity(self, ref_id: str, is_valid: bool, target_id: Optional[str] = None):
         """Update cross-reference validation status."""
-        if target_id:
-            await self.conn.execute(
-                "UPDATE cross_references SET is_valid = ?, target_id = ? WHERE ref_id = ?",
-                (is_valid, target_id, ref_id)
-            )
-        else:
-            await self.conn.execute(
-                "UPDATE cross_references SET is_valid = ? WHERE ref_id = ?",
-                (is_valid, ref_id)
-            )
-        await self.conn.commit()
+        async with self._write():
+            if target_id:
+                await self.conn.execute(
+                    "UPDATE cross_references SET is_valid = ?, target_id = ? WHERE ref_id = ?",
+                    (is_valid, target_id, ref_id)
+                )
+            else:
+                await self.conn.execute(
+                    "UPDATE cross_references SET is_valid = ? WHERE ref_id = ?",
+                    (is_valid, ref_id)
+                )
 
     # Document operations
     async def insert_document(self, document_id: str, filename: str, total_pages: int):
         """Insert document metadata."""
         now = datetime.now().isoformat()
-        await self.conn.execute("""
-            INSERT INTO documents (document_id, filename, total_pages, total_chunks,
-                                  created_at, last_updated)
-            VALUES (?, ?, ?, 0, ?, ?)
-        """, (document_id, filename, total_pages, now, now))
-        await self.conn.commit()
+        async with self._write():
+            await self.conn.execute("""
+                INSERT INTO documents (document_id, filename, total_pages, total_chunks,
+                                      created_at, last_updated)
+                VALUES (?, ?, ?, 0, ?, ?)
+            """, (document_id, filename, total_pages, now, now))
 
     async def update_document_chunks(self, document_id: str, total_chunks: int):
         """Update total chunk count for a document."""
-        await self.conn.execute("""
-            UPDATE documents SET total_chunks = ?, last_updated = ?
-            WHERE document_id = ?
-        """, (total_chunks, datetime.now().isoformat(), document_id))
-        await self.conn.commit()
+        async with self._write():
+            await self.conn.execute("""
+                UPDATE documents SET total_chunks = ?, last_updated = ?
+                WHERE document_id = ?
+            """, (total_chunks, datetime.now().isoformat(), document_id))
 
     async def get_progress(self, document_id: str) -> Dict[str, int]:
         """Get review progress statistics."""
-        async with self.conn.execute("""
-            SELECT
-                COUNT(DISTINCT c.chunk_id) as total,
-                COUNT(DISTINCT CASE WHEN r.status = 'completed' THEN c.chunk_id END) as completed,
-                COUNT(DISTINCT CASE WHEN r.status = 'in_progress' THEN c.chunk_id END) as in_progress,
-                COUNT(DISTINCT CASE WHEN r.status = 'needs_review' THEN c.chunk_id END) as needs_review
+        # Each chunk has at most one review, so one GROUP BY over the status
+        # replaces per-status COUNT(DISTINCT ...) aggregates
+        async with self._reader() as conn, conn.execute("""
+            SELECT r.status, COUNT(*)
             FROM chunks c
             LEFT JOIN reviews r ON c.chunk_id = r.chunk_id
             WHERE c.document_id = ?
+            GROUP BY r.status
         """, (document_id,)) as cursor:
-            row = await cursor.fetchone()
-            return {
-                "total": row[0],
-                "completed": row[1],
-                "in_progress": row[2],
-                "needs_review": row[3],
-                "pending": row[0] - (row[1] + row[2] + row[3])
-            }
+            counts = dict(await cursor.fetchall())
+
+        total = sum(counts.values())
+        completed = counts.get('completed', 0)
+        in_progress = counts.get('in_progress', 0)
+        needs_review = counts.get('needs_review', 0)
+        return {
+            "total": total,
+            "completed": completed,
+            "in_progress": in_progress,
+            "needs_review": needs_review,
+            "pending": total - (completed + in_progress + needs_review)
+        }
 
     # NEW: Embedding operations
-    async def insert_embedding(self, chunk_id: str, embedding_vector: list, model_name: str):
+    async def insert_embedding(self, chunk_id: str, embedding_vector, model_name: str):
         """
         Store an embedding vector for a chunk.
 
         Args:
             chunk_id: Chunk identifier
-            embedding_vector: Embedding as list of floats
+            embedding_vector: Embedding as list of floats or numpy array (stored as float32 BLOB)
+            model_name: Name of the embedding model used
+        """
+        await self.insert_embeddings([(chunk_id, embedding_vector)], model_name)
+
+    async def insert_embeddings(self, embeddings: Sequence[Tuple[str, Any]], model_name: str):
+        """
+        Store many embedding vectors with one executemany and a single commit.
+
+        Args:
+            embeddings: (chunk_id, embedding_vector) pairs
             model_name: Name of the embedding model used
         """
-        import json
         now = datetime.now().isoformat()
 
-        await self.conn.execute("""
-            INSERT INTO embeddings (chunk_id, embedding_vector, embedding_model, created_at)
-            VALUES (?, ?, ?, ?)
-        """, (chunk_id, json.dumps(embedding_vector), model_name, now))
-        await self.conn.commit()
+        async with self._write():
+            await self.conn.executemany("""
+                INSERT INTO embeddings (chunk_id, embedding_vector, embedding_model, created_at)
+                VALUES (?, ?, ?, ?)
+            """, [
+                (chunk_id, _encode_embedding(embedding_vector), model_name, now)
+                for chunk_id, embedding_vector in embeddings
+            ])
 
     async def get_embedding(self, chunk_id: str) -> Optional[Dict[str, Any]]:
         """
         Retrieve embedding for a chunk.
 
         Returns:
-            Dict with 'vector' and 'model' or None if not found
+            Dict with 'vector' (float32 numpy array) and 'model' or None if not found
         """
-        import json
-        async with self.conn.execute("""
+        async with self._reader() as conn, conn.execute("""
             SELECT embedding_vector, embedding_model
             FROM embeddings
             WHERE chunk_id = ?
@@ -386,14 +1004,102 @@ class ReviewDatabase:
             row = await cursor.fetchone()
             if row:
                 return {
-                    'vector': json.loads(row[0]),
+                    'vector': _decode_embedding(row[0]),
                     'model': row[1]
                 }
         return None
 
+    async def get_embeddings_bulk(self, chunk_ids: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+        """
+        Retrieve the latest embedding of many chunks as one matrix.
+
+        Args:
+            chunk_ids: Chunk identifiers to look up
+
+        Returns:
+            Tuple of (unique chunk IDs found, in request order; float32 matrix with
+            one row per found chunk)
+        """
+        latest = {}
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(chunk_ids), ID_LOOKUP_BATCH):
+            batch = chunk_ids[start:start + ID_LOOKUP_BATCH]
+            placeholders = ", ".join("?" for _ in batch)
+            async with self._reader() as conn, conn.execute(f"""
+                SELECT chunk_id, embedding_vector
+                FROM embeddings
+                WHERE chunk_id IN ({placeholders})
+                ORDER BY created_at DESC
+            """, tuple(batch)) as cursor:
+                rows = await cursor.fetchall()
+
+            for chunk_id, value in rows:
+                # Newest first; keep only the latest embedding per chunk
+                if chunk_id not in latest:
+                    latest[chunk_id] = value
+
+        found = [chunk_id for chunk_id in dict.fromkeys(chunk_ids) if chunk_id in latest]
+        if not found:
+            return [], np.empty((0, 0), dtype=np.float32)
+
+        matrix = np.vstack([_decode_embedding(latest[chunk_id]) for chunk_id in found])
+        return found, matrix
+
+    async def search_by_vector(self, query_vector, k: int = 10,
+                               document_id: Optional[str] = None,
+                               model_name: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        Rank stored chunk embeddings by cosine similarity to a query vector.
+
+        The float32 BLOBs are fetched in one query and scored as a single
+        numpy matrix product; nothing is decoded row by row.
+
+        Args:
+            query_vector: Query embedding (list of floats or numpy array)
+            k: Maximum number of results
+            document_id: Restrict the search to one document
+            model_name: Only consider embeddings from this model
+
+        Returns:
+            (chunk_id, cosine similarity) pairs, most similar first
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+
+        async with self._reader() as conn, conn.execute("""
+            SELECT e.chunk_id, e.embedding_vector
+            FROM embeddings e
+            JOIN chunks c ON e.chunk_id = c.chunk_id
+            WHERE (?1 IS NULL OR c.document_id = ?1)
+              AND (?2 IS NULL OR e.embedding_model = ?2)
+            ORDER BY e.created_at DESC
+        """, (document_id, model_name)) as cursor:
+            rows = await cursor.fetchall()
+
+        latest = {}
+        for chunk_id, value in rows:
+            # Newest first; keep only the latest embedding per chunk
+            if chunk_id not in latest:
+                latest[chunk_id] = _decode_embedding(value)
+
+        # Embeddings from a model with another dimension can't be compared
+        chunk_ids = [cid for cid, vec in latest.items() if vec.shape == query.shape]
+        if not chunk_ids or k <= 0:
+            return []
+
+        matrix = np.vstack([latest[cid] for cid in chunk_ids])
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        scores = (matrix @ query) / np.where(norms == 0, 1, norms)
+
+        if k < len(chunk_ids):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(chunk_ids))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(chunk_ids[i], float(scores[i])) for i in top]
+
     async def has_embeddings(self, document_id: str) -> bool:
         """Check if a document has embeddings."""
-        async with self.conn.execute("""
+        async with self._reader() as conn, conn.execute("""
             SELECT COUNT(DISTINCT e.chunk_id)
             FROM embeddings e
             JOIN chunks c ON e.chunk_id = c.chunk_id
@@ -406,12 +1112,12 @@ class ReviewDatabase:
                                                has_embeddings: bool,
                                                model_name: str = None):
         """Update document metadata to track embedding status."""
-        await self.conn.execute("""
-            UPDATE documents
-            SET has_embeddings = ?, embedding_model = ?, last_updated = ?
-            WHERE document_id = ?
-        """, (has_embeddings, model_name, datetime.now().isoformat(), document_id))
-        await self.conn.commit()
+        async with self._write():
+            await self.conn.execute("""
+                UPDATE documents
+                SET has_embeddings = ?, embedding_model = ?, last_updated = ?
+                WHERE document_id = ?
+            """, (has_embeddings, model_name, datetime.now().isoformat(), document_id))
 
     async def get_chunks_without_embeddings(self, document_id: str) -> List[Chunk]:
         """
@@ -420,25 +1126,13 @@ class ReviewDatabase:
         Returns:
             List of Chunk objects without embeddings
         """
-        async with self.conn.execute("""
+        async with self._reader() as conn, conn.execute("""
             SELECT c.chunk_id, c.document_id, c.content, c.page_start, c.page_end,
                    c.section_hierarchy, c.chunk_type, c.metadata, c.created_at
             FROM chunks c
-            LEFT JOIN embeddings e ON c.chunk_id = e.chunk_id
-            WHERE c.document_id = ? AND e.embedding_id IS NULL
+            WHERE c.document_id = ?
+              AND NOT EXISTS (SELECT 1 FROM embeddings e WHERE e.chunk_id = c.chunk_id)
         """, (document_id,)) as cursor:
             rows = await cursor.fetchall()
-            chunks = []
-            for row in rows:
-                chunks.append(Chunk(
-                    chunk_id=row[0],
-                    document_id=row[1],
-                    content=row[2],
-                    page_start=row[3],
-                    page_end=row[4],
-                    section_hierarchy=row[5],
-                    chunk_type=row[6],
-                    metadata=json.loads(row[7]) if row[7] else {},
-                    created_at=row[8]
-                ))
-            return chunks
+
+        return [_row_to_chunk(row) for row in rows]
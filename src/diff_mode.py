@@ -4,6 +4,11 @@ Generates intelligent changelogs between datasheet revisions.
 """
 
 import difflib
+import multiprocessing
+import re
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import zip_longest
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
 from datetime import datetime
@@ -12,6 +17,28 @@ from pathlib import Path
 from extraction import PDFExtractor
 from embeddings import EmbeddingGenerator
 
+try:
+    # Installed with sentence-transformers, which semantic alignment needs anyway
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+# Minimum cosine similarity for two chunks to count as the same content
+SEMANTIC_MATCH_THRESHOLD = 0.7
+
+# Technical spec keywords; a change is high significance if the text mentions
+# one (substring match on the lowercased text) and its numbers changed
+TECH_KEYWORDS = (
+    'voltage', 'current', 'frequency', 'temperature', 'max', 'min',
+    'MHz', 'GHz', 'mA', 'µA', 'typical', 'maximum', 'minimum'
+)
+
+NUMBER_PATTERN = re.compile(r'\d+\.?\d*')
+
+# Word-level diffs only compare this many words of the changed region
+# (SequenceMatcher is quadratic in the worst case; only 5 edits are reported)
+SEMANTIC_DIFF_MAX_WORDS = 500
+
 
 @dataclass
 class DocumentChange:
@@ -51,12 +78,17 @@ class DocumentDiffer:
         print(f"  V1: {Path(doc_v1_path).name}")
         print(f"  V2: {Path(doc_v2_path).name}")
 
-        # Extract both documents
-        print("\nExtracting V1...")
-        chunks_v1 = self.extractor.extract_document(doc_v1_path, "doc_v1")
-
-        print("Extracting V2...")
-        chunks_v2 = self.extractor.extract_document(doc_v2_path, "doc_v2")
+        # Extract both documents in parallel (PDF parsing is CPU-bound and
+        # PyMuPDF holds the GIL, so each version gets its own process). Workers
+        # are spawned, not forked: the embedding model's threads are already
+        # running in this process
+        print("\nExtracting V1 and V2...")
+        with ProcessPoolExecutor(max_workers=2,
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            future_v1 = executor.submit(self.extractor.extract_document, doc_v1_path, "doc_v1")
+            future_v2 = executor.submit(self.extractor.extract_document, doc_v2_path, "doc_v2")
+            chunks_v1 = future_v1.result()
+            chunks_v2 = future_v2.result()
 
         print(f"\nAligning {len(chunks_v1)} chunks from V1 with {len(chunks_v2)} chunks from V2...")
 
@@ -102,41 +134,48 @@ class DocumentDiffer:
         """Simple alignment by section hierarchy (fallback method)."""
         alignments = []
 
-        # Simple alignment by section hierarchy
-        sections_v1 = {c.section_hierarchy: c for c in chunks_v1 if c.chunk_type == 'text'}
-        sections_v2 = {c.section_hierarchy: c for c in chunks_v2 if c.chunk_type == 'text'}
-
-        all_sections = set(sections_v1.keys()) | set(sections_v2.keys())
-
-        for section in sorted(all_sections):
-            chunk_v1 = sections_v1.get(section)
-            chunk_v2 = sections_v2.get(section)
-
-            if chunk_v1 and chunk_v2:
-                # Both versions have this section
-                if chunk_v1.content != chunk_v2.content:
+        # Group text chunks by section hierarchy; a section may span several chunks
+        sections_v1 = defaultdict(list)
+        for c in chunks_v1:
+            if c.chunk_type == 'text':
+                sections_v1[c.section_hierarchy].append(c)
+        sections_v2 = defaultdict(list)
+        for c in chunks_v2:
+            if c.chunk_type == 'text':
+                sections_v2[c.section_hierarchy].append(c)
+
+        # Document order: V1 sections, then sections only present in V2
+        all_sections = list(sections_v1) + [s for s in sections_v2 if s not in sections_v1]
+
+        for section in all_sections:
+            # Pair a section's chunks positionally between versions
+            for chunk_v1, chunk_v2 in zip_longest(sections_v1.get(section, []),
+                                                  sections_v2.get(section, [])):
+                if chunk_v1 and chunk_v2:
+                    # Both versions have this chunk of the section
+                    if chunk_v1.content != chunk_v2.content:
+                        alignments.append({
+                            'type': 'modified',
+                            'section': section,
+                            'chunk_v1': chunk_v1,
+                            'chunk_v2': chunk_v2
+                        })
+                elif chunk_v1:
+                    # Removed in V2
                     alignments.append({
-                        'type': 'modified',
+                        'type': 'removed',
                         'section': section,
                         'chunk_v1': chunk_v1,
+                        'chunk_v2': None
+                    })
+                else:
+                    # Added in V2
+                    alignments.append({
+                        'type': 'added',
+                        'section': section,
+                        'chunk_v1': None,
                         'chunk_v2': chunk_v2
                     })
-            elif chunk_v1:
-                # Section removed in V2
-                alignments.append({
-                    'type': 'removed',
-                    'section': section,
-                    'chunk_v1': chunk_v1,
-                    'chunk_v2': None
-                })
-            else:
-                # Section added in V2
-                alignments.append({
-                    'type': 'added',
-                    'section': section,
-                    'chunk_v1': None,
-                    'chunk_v2': chunk_v2
-                })
 
         return alignments
 
@@ -145,7 +184,6 @@ class DocumentDiffer:
         Advanced alignment using semantic similarity.
         Better at detecting reorganized or paraphrased content.
         """
-        import numpy as np
 
         alignments = []
 
@@ -162,39 +200,27 @@ class DocumentDiffer:
         texts_v1 = [c.content for c in text_chunks_v1]
         texts_v2 = [c.content for c in text_chunks_v2]
 
-        emb_v1 = self.embedding_generator.encode(texts_v1, show_progress=True)
-        emb_v2 = self.embedding_generator.encode(texts_v2, show_progress=True)
+        # One encode call for both versions keeps the model's batches full
+        emb_all = self.embedding_generator.encode(texts_v1 + texts_v2, show_progress=True)
 
-        if emb_v1 is None or emb_v2 is None:
+        if emb_all is None:
             print("⚠️ Failed to generate embeddings, falling back to simple alignment")
             return self._align_chunks_simple(chunks_v1, chunks_v2)
 
-        # Track which v2 chunks have been matched
-        matched_v2 = set()
+        emb_v1, emb_v2 = emb_all[:len(texts_v1)], emb_all[len(texts_v1):]
 
-        # For each v1 chunk, find best match in v2
-        for i, chunk_v1 in enumerate(text_chunks_v1):
-            best_similarity = -1
-            best_match_idx = -1
-
-            # Calculate similarity with all unmatched v2 chunks
-            for j in range(len(text_chunks_v2)):
-                if j in matched_v2:
-                    continue
+        # Cosine similarity of every (v1, v2) pair in one matrix product
+        # (encode() returns float32 unit vectors, so no norms are needed)
+        similarities = emb_v1 @ emb_v2.T
 
-                # Cosine similarity
-                similarity = np.dot(emb_v1[i], emb_v2[j]) / (
-                    np.linalg.norm(emb_v1[i]) * np.linalg.norm(emb_v2[j])
-                )
+        matches = self._match_chunks(similarities)
+        matched_v2 = {j for j, _ in matches.values()}
 
-                if similarity > best_similarity:
-                    best_similarity = float(similarity)
-                    best_match_idx = j
-
-            # If good match found (>0.7 similarity), mark as modified or unchanged
-            if best_similarity >= 0.7 and best_match_idx >= 0:
+        for i, chunk_v1 in enumerate(text_chunks_v1):
+            # Matched (>= SEMANTIC_MATCH_THRESHOLD similarity): modified or unchanged
+            if i in matches:
+                best_match_idx, best_similarity = matches[i]
                 chunk_v2 = text_chunks_v2[best_match_idx]
-                matched_v2.add(best_match_idx)
 
                 # Only add if content actually changed
                 if chunk_v1.content != chunk_v2.content:
@@ -227,6 +253,41 @@ class DocumentDiffer:
         print(f"✅ Semantic alignment complete: {len(alignments)} changes detected")
         return alignments
 
+    def _match_chunks(self, similarities) -> Dict[int, Tuple[int, float]]:
+        """
+        One-to-one matching of V1 to V2 chunks on a cosine-similarity matrix.
+
+        Uses the Hungarian algorithm (globally best total similarity) when
+        scipy is available, otherwise greedily gives each V1 chunk its best
+        still-unmatched V2 chunk. Pairs below SEMANTIC_MATCH_THRESHOLD are
+        dropped.
+
+        Returns:
+            Dict mapping V1 index to (V2 index, similarity)
+        """
+        import numpy as np
+
+        if linear_sum_assignment is not None:
+            # Pairs below the threshold can never be accepted, so they must not
+            # influence the assignment either (zero them before solving)
+            eligible = np.where(similarities >= SEMANTIC_MATCH_THRESHOLD, similarities, 0.0)
+            rows, cols = linear_sum_assignment(eligible, maximize=True)
+            return {
+                i: (j, float(similarities[i, j]))
+                for i, j in zip(rows.tolist(), cols.tolist())
+                if similarities[i, j] >= SEMANTIC_MATCH_THRESHOLD
+            }
+
+        # Matched V2 columns are set to -inf in the working copy
+        remaining = similarities.copy()
+        matches = {}
+        for i in range(remaining.shape[0]):
+            j = int(remaining[i].argmax())
+            if remaining[i, j] >= SEMANTIC_MATCH_THRESHOLD:
+                matches[i] = (j, float(remaining[i, j]))
+                remaining[:, j] = -np.inf
+        return matches
+
     def _generate_changes(self, alignments: List[Dict]) -> List[DocumentChange]:
         """Generate detailed change records from alignments."""
         changes = []
@@ -287,6 +348,18 @@ class DocumentDiffer:
         words_v1 = text_v1.split()
         words_v2 = text_v2.split()
 
+        # Only the region between the common leading and trailing words
+        # changed; diff that (capped) instead of the whole chunk
+        limit = min(len(words_v1), len(words_v2))
+        prefix = 0
+        while prefix < limit and words_v1[prefix] == words_v2[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and words_v1[-1 - suffix] == words_v2[-1 - suffix]:
+            suffix += 1
+        words_v1 = words_v1[prefix:len(words_v1) - suffix][:SEMANTIC_DIFF_MAX_WORDS]
+        words_v2 = words_v2[prefix:len(words_v2) - suffix][:SEMANTIC_DIFF_MAX_WORDS]
+
         matcher = difflib.SequenceMatcher(None, words_v1, words_v2)
         changes = []
 
@@ -307,20 +380,20 @@ class DocumentDiffer:
     def _calculate_significance(self, text_v1: str, text_v2: str) -> str:
         """Classify change importance."""
         # Technical spec keywords indicate high significance
-        tech_keywords = [
-            'voltage', 'current', 'frequency', 'temperature', 'max', 'min',
-            'MHz', 'GHz', 'mA', 'µA', 'typical', 'maximum', 'minimum'
-        ]
-
         text_lower = (text_v1 + text_v2).lower()
 
-        if any(keyword in text_lower for keyword in tech_keywords):
+        if any(keyword in text_lower for keyword in TECH_KEYWORDS):
             # Check if numerical values changed
             if self._has_numerical_change(text_v1, text_v2):
                 return 'high'
 
-        # Check change magnitude
-        similarity = difflib.SequenceMatcher(None, text_v1, text_v2).ratio()
+        # Check change magnitude. quick_ratio() and real_quick_ratio() are upper
+        # bounds on ratio(), so they settle clear "medium" cases before the
+        # quadratic ratio()
+        matcher = difflib.SequenceMatcher(None, text_v1, text_v2)
+        if matcher.real_quick_ratio() < 0.5 or matcher.quick_ratio() < 0.5:
+            return 'medium'
+        similarity = matcher.ratio()
 
         if similarity < 0.5:
             return 'medium'  # Large change
@@ -331,9 +404,10 @@ class DocumentDiffer:
 
     def _has_numerical_change(self, text_v1: str, text_v2: str) -> bool:
         """Check if numerical values changed."""
-        import re
-        nums_v1 = set(re.findall(r'\d+\.?\d*', text_v1))
-        nums_v2 = set(re.findall(r'\d+\.?\d*', text_v2))
+        # Compare values, not spellings ("3.3" == "3.30"), and keep counts so a
+        # value added or removed where it already appears elsewhere still counts
+        nums_v1 = Counter(round(float(num), 4) for num in NUMBER_PATTERN.findall(text_v1))
+        nums_v2 = Counter(round(float(num), 4) for num in NUMBER_PATTERN.findall(text_v2))
         return nums_v1 != nums_v2
 
     def _categorize_changes(self, changes: List[DocumentChange]) -> Dict[str, List[DocumentChange]]:
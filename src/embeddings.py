@@ -3,6 +3,8 @@ Embedding generation module for semantic search.
 Abstracts embedding models and provides easy model swapping.
 """
 
+import hashlib
+from collections import OrderedDict
 from typing import List, Union, Optional
 import numpy as np
 
@@ -19,12 +21,25 @@ class EmbeddingGenerator:
         self.model = None
         self.available = False
 
+        # Embeddings of already-encoded texts, keyed by a content hash, so text
+        # repeated across document versions (or within one) is encoded once
+        cache_size = self.config.get('semantic', {}).get('embedding_cache_size', 10000)
+        self.cache = EmbeddingCache(max_size=cache_size)
+
+        # Device: None lets sentence-transformers pick CUDA, then MPS, then CPU
+        device = self.config.get('semantic', {}).get('device') or None
+        self.batch_size = 64
+
         # Try to load model
         try:
             from sentence_transformers import SentenceTransformer
-            self.model = SentenceTransformer(self.model_name)
+            self.model = SentenceTransformer(self.model_name, device=device)
             self.available = True
-            print(f"✅ Embedding model loaded: {self.model_name}")
+
+            # GPUs only saturate with much larger batches
+            if self.model.device.type in ('cuda', 'mps'):
+                self.batch_size = 256
+            print(f"✅ Embedding model loaded: {self.model_name} ({self.model.device})")
         except ImportError:
             print("⚠️ sentence-transformers not installed. Semantic features disabled.")
             print("   Install with: pip install sentence-transformers")
@@ -37,34 +52,71 @@ class EmbeddingGenerator:
         return self.available
 
     def encode(self, texts: Union[str, List[str]],
-               batch_size: int = 32,
+               batch_size: Optional[int] = None,
                show_progress: bool = False) -> Optional[np.ndarray]:
         """
         Generate embeddings for text(s).
 
         Args:
             texts: Single text string or list of texts
-            batch_size: Batch size for processing
+            batch_size: Batch size for processing (default: 256 on GPU, 64 on CPU)
             show_progress: Show progress bar
 
         Returns:
-            numpy array of embeddings, or None if unavailable
+            Contiguous float32 numpy array of unit-length embeddings (cosine
+            similarity is a plain dot product), or None if unavailable
         """
         if not self.available:
             return None
 
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
         try:
-            embeddings = self.model.encode(
-                texts,
-                batch_size=batch_size,
-                show_progress_bar=show_progress,
-                convert_to_numpy=True
+            keys = [self._text_key(text) for text in texts]
+
+            # Reuse cached embeddings; encode each distinct uncached text once
+            resolved = {}
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key in resolved or key in missing:
+                    continue
+                cached = self.cache.get(key)
+                if cached is not None:
+                    resolved[key] = cached
+                else:
+                    missing[key] = text
+
+            if missing:
+                new_embeddings = self.model.encode(
+                    list(missing.values()),
+                    batch_size=batch_size or self.batch_size,
+                    show_progress_bar=show_progress,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True
+                )
+                for key, embedding in zip(missing, new_embeddings):
+                    resolved[key] = embedding
+                    self.cache.put(key, embedding)
+
+            if not keys:
+                return np.empty((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+            # One contiguous float32 matrix, so downstream matmuls take the SGEMM path
+            embeddings = np.ascontiguousarray(
+                np.vstack([resolved[key] for key in keys]), dtype=np.float32
             )
-            return embeddings
+            return embeddings[0] if single else embeddings
         except Exception as e:
             print(f"❌ Error generating embeddings: {e}")
             return None
 
+    @staticmethod
+    def _text_key(text: str) -> str:
+        """Content hash used as the embedding cache key."""
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
     def encode_single(self, text: str) -> Optional[np.ndarray]:
         """
         Generate embedding for a single text.
@@ -73,17 +125,12 @@ class EmbeddingGenerator:
             text: Text to embed
 
         Returns:
-            numpy array of single embedding, or None if unavailable
+            numpy array of single unit-length embedding, or None if unavailable
         """
         if not self.available:
             return None
 
-        try:
-            embedding = self.model.encode(text, convert_to_numpy=True)
-            return embedding
-        except Exception as e:
-            print(f"❌ Error generating embedding: {e}")
-            return None
+        return self.encode(text)
 
     def similarity(self, text1: str, text2: str) -> Optional[float]:
         """
@@ -100,13 +147,11 @@ class EmbeddingGenerator:
             return None
 
         try:
-            # Generate embeddings
-            emb1 = self.model.encode(text1, convert_to_numpy=True)
-            emb2 = self.model.encode(text2, convert_to_numpy=True)
+            # Generate both (unit-length) embeddings in one batch
+            emb1, emb2 = self.encode([text1, text2])
 
-            # Calculate cosine similarity
-            similarity = np.dot(emb1, emb2) / (np.linalg.norm(emb1) * np.linalg.norm(emb2))
-            return float(similarity)
+            # Cosine similarity of unit vectors is their dot product
+            return float(np.dot(emb1, emb2))
         except Exception as e:
             print(f"❌ Error calculating similarity: {e}")
             return None
@@ -124,6 +169,7 @@ class EmbeddingGenerator:
             return {
                 'available': True,
                 'model_name': self.model_name,
+                'device': str(self.model.device),
                 'max_seq_length': self.model.max_seq_length,
                 'embedding_dimension': self.model.get_sentence_embedding_dimension(),
             }
@@ -136,23 +182,25 @@ class EmbeddingGenerator:
 
 
 class EmbeddingCache:
-    """Simple in-memory cache for embeddings to avoid recomputation."""
+    """Simple in-memory LRU cache for embeddings to avoid recomputation."""
 
     def __init__(self, max_size: int = 1000):
-        self.cache = {}
+        self.cache: OrderedDict[str, np.ndarray] = OrderedDict()
         self.max_size = max_size
 
     def get(self, text_hash: str) -> Optional[np.ndarray]:
-        """Get embedding from cache."""
-        return self.cache.get(text_hash)
+        """Get embedding from cache (marks it most recently used)."""
+        embedding = self.cache.get(text_hash)
+        if embedding is not None:
+            self.cache.move_to_end(text_hash)
+        return embedding
 
     def put(self, text_hash: str, embedding: np.ndarray):
-        """Store embedding in cache."""
-        # Simple LRU: remove oldest if full
-        if len(self.cache) >= self.max_size:
-            # Remove first item (oldest in dict order)
-            first_key = next(iter(self.cache))
-            del self.cache[first_key]
+        """Store embedding in cache, evicting the least recently used if full."""
+        if text_hash in self.cache:
+            self.cache.move_to_end(text_hash)
+        elif len(self.cache) >= self.max_size:
+            self.cache.popitem(last=False)
 
         self.cache[text_hash] = embedding
 
@@ -5,16 +5,81 @@ Extracts text, tables, and figures from PDF with structure preservation.
 
 import fitz  # PyMuPDF
 import pdfplumber
+import multiprocessing
+import os
 import re
 import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import islice
 from typing import List, Dict, Tuple, Optional, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
 
 
-@dataclass
+# Parallel extraction only pays off once each worker gets at least this many
+# pages (every worker re-opens the PDF)
+MIN_PAGES_PER_WORKER = 8
+
+# Part of every extraction cache key; bump whenever extraction output changes
+# for the same PDF and settings so stale cache entries are ignored
+EXTRACTION_CACHE_VERSION = 1
+
+# Text-only "dict" extraction for heading detection: without
+# TEXT_PRESERVE_IMAGES, image blocks (and their decoded bytes) are left out
+STRUCTURE_TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+# Section number at the start of a TOC title (e.g., "13.0 I/O Ports" -> "13.0")
+TOC_SECTION_PATTERN = re.compile(r'^(\d+(?:\.\d+)*)')
+
+# IMPROVED: More flexible section pattern to reduce false negatives, as one
+# alternation (a number followed by any word, e.g. "1.2.3 TITLE" or
+# "1.2.3 introduction", or "SECTION 3.1" / "Section 3.1")
+SECTION_HEADER_PATTERN = re.compile(
+    r'^(?:(?:SECTION|Section)\s+(\d+(?:\.\d+)*)|\s*(\d+(?:\.\d+)*)\s+\w)'
+)
+
+# Paragraph-level boundaries for semantic chunking also accept bare headings
+SEGMENT_BOUNDARY_PATTERNS = (
+    SECTION_HEADER_PATTERN,
+    re.compile(r'^[A-Z][A-Z\s]{10,}$'),                # ALL CAPS headings
+    re.compile(r'^[A-Z][a-z\s]+:$'),                   # Title case with colon
+)
+
+# Caption patterns capture the figure/table number as group 1, which callers
+# compare against the index they are looking for
+FIGURE_CAPTION_PATTERNS = (
+    re.compile(r'Figure\s+(\d+)[:\.]?\s+(.+?)(?:\n|$)', re.IGNORECASE),
+    re.compile(r'Fig\.\s+(\d+)[:\.]?\s+(.+?)(?:\n|$)', re.IGNORECASE),
+)
+TABLE_CAPTION_PATTERN = re.compile(r'Table\s+(\d+)[:\.]?\s+(.+?)(?:\n|$)', re.IGNORECASE)
+HYPHENATED_TABLE_CAPTION_PATTERN = re.compile(
+    r'Table\s+(\d+-\d+)[:\.]?\s+(.+?)(?:\n|$)', re.IGNORECASE
+)
+
+# Sentence break ("[.!?]" + whitespace) as it appears in reversed text, so the
+# last breaks of a chunk are found first without splitting the whole chunk
+REVERSED_SENTENCE_BREAK_PATTERN = re.compile(r'\s+[.!?]')
+
+
+def _search_numbered(pattern: re.Pattern, text: str, number: int) -> Optional[re.Match]:
+    """
+    Find the first match of a caption pattern whose captured number is `number`.
+
+    Retries from every match start, so it finds the same match as searching
+    for a pattern with the number spelled out.
+    """
+    wanted = str(number)
+    pos = 0
+    while True:
+        match = pattern.search(text, pos)
+        if match is None or match.group(1) == wanted:
+            return match
+        pos = match.start() + 1
+
+
+@dataclass(slots=True)
 class ExtractedChunk:
     """Represents a chunk of extracted content."""
     chunk_id: str
@@ -41,6 +106,19 @@ class PDFExtractor:
         self.min_chunk_size = config.get('document', {}).get('min_chunk_size', 500)  # Min chars for semantic chunks
         self.max_chunk_size = config.get('document', {}).get('max_chunk_size', 2500)  # Max chars for semantic chunks
 
+        # Worker processes for page extraction (1 = extract in this process)
+        self.parallel_workers = max(1, config.get('document', {}).get('parallel_workers', 4))
+
+        # Table recognition: 'pdfplumber' (separate pass) or 'pymupdf' (same pass as text)
+        self.table_engine = config.get('document', {}).get('table_engine', 'pdfplumber')
+
+        # On-disk cache of extraction results, keyed by PDF content and settings
+        self.cache_enabled = config.get('document', {}).get('extraction_cache', True)
+        self.cache_dir = Path(os.path.expanduser(
+            config.get('document', {}).get('extraction_cache_dir', '~/.cache/mchp-datasheet-review')
+        ))
+        self.force_refresh = config.get('document', {}).get('force_refresh', False)
+
     def extract_document(self, pdf_path: str, document_id: str) -> List[ExtractedChunk]:
         """
         Extract and chunk a PDF document.
@@ -52,37 +130,179 @@ class PDFExtractor:
         Returns:
             List of extracted chunks
         """
-        chunks = []
+        # Re-extraction of an unchanged PDF with unchanged settings is a cache hit
+        cache_path = self._cache_path(pdf_path, document_id) if self.cache_enabled else None
+        if cache_path and not self.force_refresh:
+            cached_chunks = self._load_cached_extraction(cache_path)
+            if cached_chunks is not None:
+                return cached_chunks
 
         # Use PyMuPDF for text and structure
         doc = fitz.open(pdf_path)
 
         # First pass: extract structure and identify section breaks
         document_structure = self._extract_structure(doc)
+        page_count = len(doc)
+
+        workers = min(self.parallel_workers, os.cpu_count() or 1, page_count // MIN_PAGES_PER_WORKER)
+        if workers <= 1:
+            # Second pass: extract content (and tables) reusing the open document
+            try:
+                page_chunks, table_chunks = self._extract_page_range(
+                    pdf_path, document_id, document_structure, range(page_count), doc=doc
+                )
+            finally:
+                doc.close()
 
-        # Second pass: extract content with context
-        for page_num in range(len(doc)):
+            chunks = page_chunks + table_chunks
+        else:
+            doc.close()
+
+            # Second pass over contiguous page ranges in worker processes
+            # (parsing is CPU-bound; fitz/pdfplumber objects can't be pickled,
+            # so each worker opens the PDF itself). Workers are spawned, not
+            # forked: callers may have threads running (e.g. aiosqlite's
+            # connection threads), and forking those can deadlock the child.
+            pages_per_worker = -(-page_count // workers)
+            page_ranges = [
+                range(start, min(start + pages_per_worker, page_count))
+                for start in range(0, page_count, pages_per_worker)
+            ]
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                results = list(executor.map(
+                    self._extract_page_range,
+                    [pdf_path] * len(page_ranges),
+                    [document_id] * len(page_ranges),
+                    [document_structure] * len(page_ranges),
+                    page_ranges
+                ))
+
+            # Same order as a serial run: page content first, then all tables
+            chunks = [chunk for page_chunks, _ in results for chunk in page_chunks]
+            chunks.extend(chunk for _, table_chunks in results for chunk in table_chunks)
+
+        # Fourth pass: perform intelligent chunking on text sections
+        final_chunks = self._perform_intelligent_chunking(chunks, document_id)
+
+        if cache_path:
+            self._save_cached_extraction(cache_path, final_chunks)
+
+        return final_chunks
+
+    def _cache_path(self, pdf_path: str, document_id: str) -> Path:
+        """Cache file for a PDF: hash of its bytes plus every setting that shapes the chunks."""
+        hasher = hashlib.blake2b(digest_size=16)
+        with open(pdf_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                hasher.update(block)
+
+        settings = {
+            "version": EXTRACTION_CACHE_VERSION,
+            "document_id": document_id,
+            "chunk_size": self.chunk_size,
+            "overlap": self.overlap,
+            "preserve_sections": self.preserve_sections,
+            "extract_images": self.extract_images,
+            "chunking_strategy": self.chunking_strategy,
+            "min_chunk_size": self.min_chunk_size,
+            "max_chunk_size": self.max_chunk_size,
+            "table_engine": self.table_engine,
+        }
+        hasher.update(json.dumps(settings, sort_keys=True).encode())
+
+        return self.cache_dir / f"{hasher.hexdigest()}.json"
+
+    def _load_cached_extraction(self, cache_path: Path) -> Optional[List[ExtractedChunk]]:
+        """Load cached chunks (and TOC sections); None on a miss or unreadable entry."""
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            chunks = [ExtractedChunk(**chunk) for chunk in cached["chunks"]]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Warning: Ignoring unreadable extraction cache {cache_path}: {e}")
+            return None
+
+        # Restore the side effect of _extract_structure
+        self.toc_sections = set(cached.get("toc_sections", []))
+        return chunks
+
+    def _save_cached_extraction(self, cache_path: Path, chunks: List[ExtractedChunk]):
+        """Write chunks to the cache atomically (concurrent extractions may share it)."""
+        cached = {
+            "toc_sections": sorted(getattr(self, 'toc_sections', set())),
+            "chunks": [asdict(chunk) for chunk in chunks],
+        }
+
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(cached, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Warning: Could not write extraction cache {cache_path}: {e}")
+
+    def _extract_pages(self, doc: fitz.Document, pages: range, structure: Dict[int, str],
+                       document_id: str) -> Tuple[List[ExtractedChunk], List[ExtractedChunk]]:
+        """
+        Extract content from a range of pages of an open document.
+
+        Returns:
+            Tuple of (text and figure chunks, table chunks); table chunks are
+            only produced here when the PyMuPDF table engine is selected
+        """
+        chunks = []
+        table_chunks = []
+
+        for page_num in pages:
             page = doc[page_num]
+            # Page text is shared by the text chunk and all caption lookups
+            page_text = page.get_text()
 
             # Extract text blocks
-            text_chunks = self._extract_text_from_page(page, page_num, document_structure)
+            text_chunks = self._extract_text_from_page(page, page_num, structure, page_text)
             chunks.extend(text_chunks)
 
             # Extract images/figures
             if self.extract_images:
-                figure_chunks = self._extract_figures_from_page(page, page_num, document_id)
+                figure_chunks = self._extract_figures_from_page(page, page_num, document_id, page_text)
                 chunks.extend(figure_chunks)
 
-        doc.close()
+            # Extract tables from the same parsed page
+            if self.table_engine == 'pymupdf':
+                table_chunks.extend(self._extract_tables_from_page(page, page_num, page_text))
 
-        # Third pass: extract tables using pdfplumber
-        table_chunks = self._extract_tables(pdf_path, document_id)
-        chunks.extend(table_chunks)
+        return chunks, table_chunks
 
-        # Fourth pass: perform intelligent chunking on text sections
-        final_chunks = self._perform_intelligent_chunking(chunks, document_id)
+    def _extract_page_range(self, pdf_path: str, document_id: str, structure: Dict[int, str],
+                            pages: range,
+                            doc: Optional[fitz.Document] = None) -> Tuple[List[ExtractedChunk], List[ExtractedChunk]]:
+        """
+        Extract one range of pages (also the worker-process entry point).
 
-        return final_chunks
+        Args:
+            doc: Already-open document to reuse; opened (and closed) here if None
+
+        Returns:
+            Tuple of (text and figure chunks, table chunks) for the pages
+        """
+        own_doc = doc is None
+        if own_doc:
+            doc = fitz.open(pdf_path)
+        try:
+            page_chunks, table_chunks = self._extract_pages(doc, pages, structure, document_id)
+        finally:
+            if own_doc:
+                doc.close()
+
+        # Separate pdfplumber pass over the same pages
+        if self.table_engine == 'pdfplumber':
+            table_chunks = self._extract_tables(pdf_path, document_id, pages)
+
+        return page_chunks, table_chunks
 
     def _extract_toc_sections(self, doc: fitz.Document) -> set:
         """
@@ -98,7 +318,7 @@ class PDFExtractor:
             toc = doc.get_toc()
             for level, title, page in toc:
                 # Extract section number from title (e.g., "13.0 I/O Ports" -> "13.0")
-                match = re.match(r'^(\d+(?:\.\d+)*)', title.strip())
+                match = TOC_SECTION_PATTERN.match(title.strip())
                 if match:
                     section_numbers.add(match.group(1))
         except Exception as e:
@@ -122,41 +342,33 @@ class PDFExtractor:
         # Store TOC sections for cross-reference validation
         self.toc_sections = toc_sections
 
-        # IMPROVED: More flexible section patterns to reduce false negatives
-        section_patterns = [
-            re.compile(r'^(\d+(?:\.\d+)*)\s+[A-Z]'),           # "1.2.3 TITLE"
-            re.compile(r'^(\d+(?:\.\d+)*)\s+[a-z]'),           # "1.2.3 introduction"
-            re.compile(r'(?:^|\n)\s*(\d+(?:\.\d+)*)\s+\w+'),   # Any word after number
-            re.compile(r'^SECTION\s+(\d+(?:\.\d+)*)'),         # "SECTION 3.1"
-            re.compile(r'^Section\s+(\d+(?:\.\d+)*)'),         # "Section 3.1"
-        ]
-
         for page_num in range(len(doc)):
             page = doc[page_num]
-            blocks = page.get_text("dict")["blocks"]
+            blocks = page.get_text("dict", flags=STRUCTURE_TEXT_FLAGS)["blocks"]
 
             for block in blocks:
                 if block.get("type") == 0:  # Text block
                     for line in block.get("lines", []):
-                        text = "".join([span["text"] for span in line.get("spans", [])])
+                        spans = line.get("spans")
 
-                        # Detect section headers by font size and pattern
-                        if line.get("spans"):
-                            font_size = line["spans"][0].get("size", 0)
+                        # Detect section headers by font size and pattern; headers
+                        # typically have larger font, so other lines are skipped
+                        # before their text is even assembled
+                        if not spans or spans[0].get("size", 0) <= 12:
+                            continue
 
-                            # Headers typically have larger font
-                            if font_size > 12 and any(p.match(text.strip()) for p in section_patterns):
-                                current_section = text.strip()
+                        text = "".join([span["text"] for span in spans]).strip()
+                        if SECTION_HEADER_PATTERN.match(text):
+                            current_section = text
 
             structure[page_num] = current_section
 
         return structure
 
     def _extract_text_from_page(self, page: fitz.Page, page_num: int,
-                                structure: Dict[int, str]) -> List[ExtractedChunk]:
-        """Extract text content from a page."""
+                                structure: Dict[int, str], text: str) -> List[ExtractedChunk]:
+        """Extract text content from a page, given its already-extracted text."""
         chunks = []
-        text = page.get_text()
 
         if not text.strip():
             return chunks
@@ -184,7 +396,7 @@ class PDFExtractor:
         return chunks
 
     def _extract_figures_from_page(self, page: fitz.Page, page_num: int,
-                                   document_id: str) -> List[ExtractedChunk]:
+                                   document_id: str, page_text: str) -> List[ExtractedChunk]:
         """Extract figures/images from a page."""
         chunks = []
         images = page.get_images()
@@ -194,7 +406,7 @@ class PDFExtractor:
             base_image = page.parent.extract_image(xref)
 
             # Look for figure caption nearby
-            caption = self._find_figure_caption(page, img_index)
+            caption = self._find_figure_caption(page_text, img_index)
 
             metadata = {
                 "page": page_num + 1,
@@ -223,29 +435,59 @@ class PDFExtractor:
 
         return chunks
 
-    def _find_figure_caption(self, page: fitz.Page, img_index: int) -> Optional[str]:
-        """Attempt to find a caption for a figure."""
-        text = page.get_text()
-
+    def _find_figure_caption(self, text: str, img_index: int) -> Optional[str]:
+        """Attempt to find a caption for a figure in the page text."""
         # Look for common caption patterns
-        patterns = [
-            rf"Figure\s+{img_index + 1}[:\.]?\s+(.+?)(?:\n|$)",
-            rf"Fig\.\s+{img_index + 1}[:\.]?\s+(.+?)(?:\n|$)",
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in FIGURE_CAPTION_PATTERNS:
+            match = _search_numbered(pattern, text, img_index + 1)
             if match:
-                return match.group(1).strip()
+                return match.group(2).strip()
 
         return None
 
-    def _extract_tables(self, pdf_path: str, document_id: str) -> List[ExtractedChunk]:
+    def _extract_tables_from_page(self, page: fitz.Page, page_num: int,
+                                  page_text: str) -> List[ExtractedChunk]:
+        """Extract tables from an already-parsed page using PyMuPDF table recognition."""
+        chunks = []
+
+        for table_index, table in enumerate(self._find_tables_pymupdf(page)):
+            # Skip empty tables (after all strategies)
+            if not table or len(table) < 2:
+                continue
+
+            # Check if table has actual content
+            if self._is_table_empty(table):
+                continue
+
+            caption = self._find_table_caption_improved(page_text, table_index)
+
+            chunks.append(self._build_table_chunk(table, table_index, page_num, caption))
+
+        return chunks
+
+    def _find_tables_pymupdf(self, page: fitz.Page) -> List:
+        """Try ruling-line detection first, then fall back to text alignment."""
+        # Strategy 1: Line-based extraction (for tables with visible borders)
+        tables = [table.extract() for table in page.find_tables(strategy="lines_strict").tables]
+
+        if tables and any(not self._is_table_empty(t) for t in tables):
+            return tables
+
+        # Strategy 2: Text-based extraction (for borderless tables)
+        return [table.extract() for table in page.find_tables(strategy="text").tables]
+
+    def _extract_tables(self, pdf_path: str, document_id: str,
+                        pages: Optional[range] = None) -> List[ExtractedChunk]:
         """Extract tables using pdfplumber with multi-strategy approach."""
         chunks = []
 
         with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages):
+            if pages is None:
+                pages = range(len(pdf.pages))
+
+            for page_num in pages:
+                page = pdf.pages[page_num]
+                page_text = None
                 # IMPROVED: Multi-strategy table extraction
                 tables = self._extract_tables_multi_strategy(page)
 
@@ -258,40 +500,45 @@ class PDFExtractor:
                     if self._is_table_empty(table):
                         continue
 
-                    # Convert table to markdown format
-                    table_md = self._table_to_markdown(table)
-
-                    # IMPROVED: Better caption finding
-                    caption = self._find_table_caption_improved(page, table_index)
-
-                    content = f"[Table {table_index + 1}]\n"
-                    if caption:
-                        content += f"Caption: {caption}\n\n"
-                    content += table_md
-
-                    metadata = {
-                        "page": page_num + 1,
-                        "table_index": table_index,
-                        "rows": len(table),
-                        "columns": len(table[0]) if table else 0,
-                        "caption": caption,
-                        "extraction_quality": "good" if not self._is_table_sparse(table) else "sparse"
-                    }
-
-                    chunk = ExtractedChunk(
-                        chunk_id=self._generate_chunk_id(content, page_num, f"tbl_{table_index}"),
-                        content=content,
-                        page_start=page_num + 1,
-                        page_end=page_num + 1,
-                        chunk_type="table",
-                        section_hierarchy=f"Table {table_index + 1}",
-                        metadata=metadata
-                    )
-
-                    chunks.append(chunk)
+                    # IMPROVED: Better caption finding (page text extracted at most once)
+                    if page_text is None:
+                        page_text = page.extract_text()
+                    caption = self._find_table_caption_improved(page_text, table_index)
+
+                    chunks.append(self._build_table_chunk(table, table_index, page_num, caption))
 
         return chunks
 
+    def _build_table_chunk(self, table: List[List], table_index: int, page_num: int,
+                           caption: Optional[str]) -> ExtractedChunk:
+        """Build a table chunk (markdown content plus metadata) from extracted rows."""
+        # Convert table to markdown format
+        table_md = self._table_to_markdown(table)
+
+        content = f"[Table {table_index + 1}]\n"
+        if caption:
+            content += f"Caption: {caption}\n\n"
+        content += table_md
+
+        metadata = {
+            "page": page_num + 1,
+            "table_index": table_index,
+            "rows": len(table),
+            "columns": len(table[0]) if table else 0,
+            "caption": caption,
+            "extraction_quality": "good" if not self._is_table_sparse(table) else "sparse"
+        }
+
+        return ExtractedChunk(
+            chunk_id=self._generate_chunk_id(content, page_num, f"tbl_{table_index}"),
+            content=content,
+            page_start=page_num + 1,
+            page_end=page_num + 1,
+            chunk_type="table",
+            section_hierarchy=f"Table {table_index + 1}",
+            metadata=metadata
+        )
+
     def _extract_tables_multi_strategy(self, page) -> List:
         """Try multiple extraction strategies to get the best table data."""
         # Strategy 1: Standard extraction
@@ -324,14 +571,14 @@ class PDFExtractor:
         if not table or len(table) < 2:
             return True
 
-        # Count non-empty cells
-        non_empty_cells = sum(
-            1 for row in table for cell in row
-            if cell and str(cell).strip() and str(cell).strip() not in ['', '---']
+        # Non-empty cells (extracted cells are str or None)
+        non_empty_cells = (
+            cell for row in table for cell in row
+            if cell and cell.strip() not in ('', '---')
         )
 
-        # Need at least 3 non-empty cells for a valid table
-        return non_empty_cells < 3
+        # Need at least 3 non-empty cells for a valid table (stop counting there)
+        return len(list(islice(non_empty_cells, 3))) < 3
 
     def _is_table_sparse(self, table: List[List]) -> bool:
         """Check if table has many empty cells."""
@@ -344,31 +591,26 @@ class PDFExtractor:
 
         empty_cells = sum(
             1 for row in table for cell in row
-            if not cell or not str(cell).strip()
+            if not cell or not cell.strip()
         )
 
         return (empty_cells / total_cells) > 0.5  # More than 50% empty
 
-    def _find_table_caption_improved(self, page, table_index: int) -> Optional[str]:
-        """Improved caption detection with better patterns."""
-        text = page.extract_text()
-
+    def _find_table_caption_improved(self, text: Optional[str], table_index: int) -> Optional[str]:
+        """Improved caption detection with better patterns, given the page text."""
         if not text:
             return None
 
         # Try multiple caption patterns
-        patterns = [
-            rf'Table\s+{table_index + 1}[:\.]?\s+(.+?)(?:\n|$)',
-            rf'TABLE\s+{table_index + 1}[:\.]?\s+(.+?)(?:\n|$)',
-            rf'Table\s+(\d+-\d+)[:\.]?\s+(.+?)(?:\n|$)',  # Hyphenated table numbers
-            rf'TABLE\s+(\d+-\d+)[:\.]?\s+(.+?)(?:\n|$)',
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        matches = (
+            _search_numbered(TABLE_CAPTION_PATTERN, text, table_index + 1),
+            HYPHENATED_TABLE_CAPTION_PATTERN.search(text),  # Hyphenated table numbers
+        )
+
+        for match in matches:
             if match:
-                # Get the caption text (last group)
-                caption = match.group(match.lastindex).strip()
+                # Get the caption text
+                caption = match.group(2).strip()
                 if len(caption) > 3:  # Avoid single character matches
                     return caption[:200]  # Limit caption length
 
@@ -406,15 +648,9 @@ class PDFExtractor:
             return None
 
         # Look for common caption patterns
-        patterns = [
-            rf"Table\s+{table_index + 1}[:\.]?\s+(.+?)(?:\n|$)",
-            rf"TABLE\s+{table_index + 1}[:\.]?\s+(.+?)(?:\n|$)",
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(1).strip()
+        match = _search_numbered(TABLE_CAPTION_PATTERN, text, table_index + 1)
+        if match:
+            return match.group(2).strip()
 
         return None
 
@@ -459,12 +695,16 @@ class PDFExtractor:
         # Split by paragraphs first
         paragraphs = text.split('\n\n')
 
-        current_text = ""
+        # Paragraphs of the current sub-chunk, joined only when it is emitted
+        current_parts = []
+        current_len = 0
         chunk_index = 0
 
         for para in paragraphs:
             # If adding this paragraph would exceed chunk size
-            if len(current_text) + len(para) > self.chunk_size and current_text:
+            if current_len + len(para) > self.chunk_size and current_len:
+                current_text = "\n\n".join(current_parts)
+
                 # Save current chunk
                 sub_chunk = ExtractedChunk(
                     chunk_id=f"{chunk.chunk_id}_sub_{chunk_index}",
@@ -480,11 +720,17 @@ class PDFExtractor:
 
                 # Start new chunk with overlap
                 overlap_text = current_text[-self.overlap:] if len(current_text) > self.overlap else current_text
-                current_text = overlap_text + "\n\n" + para
+                current_parts = [overlap_text, para]
+                current_len = len(overlap_text) + 2 + len(para)
+            elif current_len:
+                current_parts.append(para)
+                current_len += 2 + len(para)
             else:
-                current_text += "\n\n" + para if current_text else para
+                current_parts = [para]
+                current_len = len(para)
 
         # Add final chunk
+        current_text = "\n\n".join(current_parts)
         if current_text.strip():
             sub_chunk = ExtractedChunk(
                 chunk_id=f"{chunk.chunk_id}_sub_{chunk_index}",
@@ -510,7 +756,9 @@ class PDFExtractor:
         # Identify semantic boundaries (section headers, major paragraph breaks)
         semantic_segments = self._identify_semantic_segments(text)
 
-        current_text = ""
+        # Segments of the current sub-chunk, joined only when it is emitted
+        current_parts = []
+        current_len = 0
         chunk_index = 0
 
         for segment in semantic_segments:
@@ -518,26 +766,13 @@ class PDFExtractor:
             is_section_boundary = segment['is_boundary']
 
             # Force new chunk at section boundaries (if current chunk has content)
-            if is_section_boundary and current_text and len(current_text) >= self.min_chunk_size:
-                # Save current chunk
-                sub_chunk = ExtractedChunk(
-                    chunk_id=f"{chunk.chunk_id}_sub_{chunk_index}",
-                    content=current_text.strip(),
-                    page_start=chunk.page_start,
-                    page_end=chunk.page_end,
-                    chunk_type=chunk.chunk_type,
-                    section_hierarchy=chunk.section_hierarchy,
-                    metadata={**chunk.metadata, "sub_chunk": chunk_index, "chunking_strategy": "semantic"}
-                )
-                sub_chunks.append(sub_chunk)
-                chunk_index += 1
-
-                # Start new chunk with semantic context (smaller overlap)
-                overlap_text = self._get_semantic_overlap(current_text)
-                current_text = overlap_text + "\n\n" + segment_text if overlap_text else segment_text
+            # or when adding this segment would exceed max size
+            if current_len and (
+                (is_section_boundary and current_len >= self.min_chunk_size)
+                or current_len + len(segment_text) > self.max_chunk_size
+            ):
+                current_text = "\n\n".join(current_parts)
 
-            # If adding this segment would exceed max size
-            elif len(current_text) + len(segment_text) > self.max_chunk_size and current_text:
                 # Save current chunk
                 sub_chunk = ExtractedChunk(
                     chunk_id=f"{chunk.chunk_id}_sub_{chunk_index}",
@@ -551,13 +786,23 @@ class PDFExtractor:
                 sub_chunks.append(sub_chunk)
                 chunk_index += 1
 
-                # Start new chunk with overlap
+                # Start new chunk with semantic context (smaller overlap)
                 overlap_text = self._get_semantic_overlap(current_text)
-                current_text = overlap_text + "\n\n" + segment_text if overlap_text else segment_text
+                if overlap_text:
+                    current_parts = [overlap_text, segment_text]
+                    current_len = len(overlap_text) + 2 + len(segment_text)
+                else:
+                    current_parts = [segment_text]
+                    current_len = len(segment_text)
+            elif current_len:
+                current_parts.append(segment_text)
+                current_len += 2 + len(segment_text)
             else:
-                current_text += "\n\n" + segment_text if current_text else segment_text
+                current_parts = [segment_text]
+                current_len = len(segment_text)
 
         # Add final chunk (if it meets minimum size or is the only chunk)
+        current_text = "\n\n".join(current_parts)
         if current_text.strip() and (len(current_text) >= self.min_chunk_size or chunk_index == 0):
             sub_chunk = ExtractedChunk(
                 chunk_id=f"{chunk.chunk_id}_sub_{chunk_index}",
@@ -587,24 +832,13 @@ class PDFExtractor:
         # Split by double newline (paragraph boundaries)
         paragraphs = text.split('\n\n')
 
-        # IMPROVED: More flexible patterns for section headers
-        section_patterns = [
-            re.compile(r'^(\d+(?:\.\d+)*)\s+[A-Z]'),           # "3.1 SECTION"
-            re.compile(r'^(\d+(?:\.\d+)*)\s+[a-z]'),           # "3.1 introduction"
-            re.compile(r'(?:^|\n)\s*(\d+(?:\.\d+)*)\s+\w+'),   # Number + any word
-            re.compile(r'^SECTION\s+(\d+(?:\.\d+)*)'),         # "SECTION 3.1"
-            re.compile(r'^Section\s+(\d+(?:\.\d+)*)'),         # "Section 3.1"
-            re.compile(r'^[A-Z][A-Z\s]{10,}$'),                # ALL CAPS headings
-            re.compile(r'^[A-Z][a-z\s]+:$'),                   # Title case with colon
-        ]
-
         for para in paragraphs:
             para_stripped = para.strip()
             if not para_stripped:
                 continue
 
             # Check if this paragraph is a section header
-            is_boundary = any(pattern.match(para_stripped) for pattern in section_patterns)
+            is_boundary = any(pattern.match(para_stripped) for pattern in SEGMENT_BOUNDARY_PATTERNS)
 
             # Also detect headers by length (very short paragraphs at line start)
             if not is_boundary and len(para_stripped) < 60 and '\n' not in para_stripped:
@@ -627,13 +861,20 @@ class PDFExtractor:
         if len(text) < 100:
             return ""
 
-        # Try to get last 1-2 sentences
-        sentences = re.split(r'[.!?]\s+', text)
+        # Try to get last 1-2 sentences: find the last two sentence breaks by
+        # scanning the reversed text
+        breaks = REVERSED_SENTENCE_BREAK_PATTERN.finditer(text[::-1])
+        last_break = next(breaks, None)
+
+        if last_break is not None:
+            previous_break = next(breaks, None)
+            text_len = len(text)
+            last_sentence = text[text_len - last_break.start():]
+            previous_start = text_len - previous_break.start() if previous_break else 0
+            previous_sentence = text[previous_start:text_len - last_break.end()]
 
-        if len(sentences) >= 2:
             # Return last 2 sentences (or less if they're too long)
-            overlap_candidates = sentences[-2:]
-            overlap_text = '. '.join(overlap_candidates)
+            overlap_text = previous_sentence + '. ' + last_sentence
 
             # Limit overlap to reasonable size
             max_overlap = min(self.overlap * 2, 400)
@@ -4,7 +4,9 @@ Provides async API integration for secure LLM services.
 """
 
 import asyncio
+import hashlib
 import os
+from collections import OrderedDict
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 import httpx
@@ -19,6 +21,49 @@ try:
 except ImportError:
     LOCAL_API_KEY = None
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Shared decoder for pulling the JSON payload out of LLM responses
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _extract_json_object(content: str) -> Optional[Dict[str, Any]]:
+    """
+    Decode the first JSON object in an LLM response.
+
+    Models often wrap the JSON in a ```json fence or add a sentence before or
+    after it. Decoding from the first '{' with raw_decode parses the object in
+    a single pass and ignores whatever trails it.
+
+    Args:
+        content: Raw message content from the API
+
+    Returns:
+        Decoded dictionary, or None if no JSON object could be parsed
+    """
+    start = content.find('{')
+    if start == -1:
+        return None
+
+    # Fast path: the whole response is the JSON object, as the prompt asks
+    try:
+        parsed = _json_loads(content)
+        if isinstance(parsed, dict):
+            return parsed
+    except json.JSONDecodeError:
+        pass
+
+    try:
+        parsed, _ = _JSON_DECODER.raw_decode(content, start)
+    except json.JSONDecodeError:
+        return None
+
+    return parsed if isinstance(parsed, dict) else None
+
 
 @dataclass
 class LLMResponse:
@@ -63,6 +108,16 @@ class LLMClient:
         # Semaphore for concurrent request limiting
         self.semaphore = asyncio.Semaphore(self.concurrent_requests)
 
+        # Response cache: identical prompts (e.g. boilerplate sections repeated
+        # across datasheets) reuse the earlier response instead of a new API call.
+        # Only safe when temperature is 0, since output is then deterministic.
+        cache_config = self.llm_config.get('cache', {})
+        self.cache_enabled = cache_config.get('enabled', True) and self.temperature == 0
+        self.cache_max_entries = cache_config.get('max_entries', 10000)
+        self._response_cache: OrderedDict[str, LLMResponse] = OrderedDict()
+        self._pending_requests: Dict[str, asyncio.Task] = {}
+        self.cache_hits = 0
+
         # HTTP client
         self.client = None
 
@@ -104,10 +159,53 @@ class LLMClient:
 
         prompt = self._build_review_prompt(text, context)
 
+        if not self.cache_enabled:
+            return await self._request_review(prompt)
+
+        cache_key = self._cache_key(prompt)
+        if cache_key in self._response_cache:
+            self._response_cache.move_to_end(cache_key)
+            self.cache_hits += 1
+            return self._response_cache[cache_key]
+
+        # Identical prompts already in flight (duplicate chunks reviewed
+        # concurrently) share one API call instead of each missing the cache
+        task = self._pending_requests.get(cache_key)
+        if task is None:
+            task = asyncio.create_task(self._request_review(prompt, cache_key))
+            self._pending_requests[cache_key] = task
+            task.add_done_callback(lambda _: self._pending_requests.pop(cache_key, None))
+        else:
+            self.cache_hits += 1
+
+        return await asyncio.shield(task)
+
+    async def _request_review(self, prompt: str, cache_key: Optional[str] = None) -> LLMResponse:
+        """
+        Call the API for a review prompt and cache the parsed response.
+
+        Args:
+            prompt: Review prompt to send
+            cache_key: Response cache key, or None to skip caching
+
+        Returns:
+            Parsed LLMResponse
+        """
         async with self.semaphore:
             response = await self._call_api(prompt)
 
-        return self._parse_response(response)
+        parsed = self._parse_response(response)
+
+        if cache_key is not None:
+            self._response_cache[cache_key] = parsed
+            if len(self._response_cache) > self.cache_max_entries:
+                self._response_cache.popitem(last=False)
+
+        return parsed
+
+    def _cache_key(self, prompt: str) -> str:
+        """Build the response cache key for a prompt (model + exact prompt text)."""
+        return hashlib.sha256(f"{self.model}\0{prompt}".encode('utf-8')).hexdigest()
 
     async def review_batch(self, texts: List[str],
                           contexts: Optional[List[str]] = None) -> List[LLMResponse]:
@@ -278,7 +376,7 @@ IMPORTANT: The "changes" array must contain objects with "original", "corrected"
                     if line.startswith("data: "):
                         try:
                             data_str = line[6:]  # Remove "data: " prefix
-                            chunk = json.loads(data_str)
+                            chunk = _json_loads(data_str)
 
                             # Extract content delta from chunk
                             if "choices" in chunk and len(chunk["choices"]) > 0:
@@ -331,8 +429,8 @@ IMPORTANT: The "changes" array must contain objects with "original", "corrected"
             content = api_response.get('choices', [{}])[0].get('message', {}).get('content', '')
 
             # Try to parse as JSON
-            try:
-                parsed_content = json.loads(content)
+            parsed_content = _extract_json_object(content)
+            if parsed_content is not None:
                 return LLMResponse(
                     content=parsed_content.get('corrected_text', content),
                     confidence=parsed_content.get('confidence', 0.8),
@@ -342,13 +440,13 @@ IMPORTANT: The "changes" array must contain objects with "original", "corrected"
                         'raw_response': api_response
                     }
                 )
-            except json.JSONDecodeError:
-                # If not JSON, return raw content
-                return LLMResponse(
-                    content=content,
-                    confidence=0.7,
-                    metadata={'raw_response': api_response}
-                )
+
+            # If not JSON, return raw content
+            return LLMResponse(
+                content=content,
+                confidence=0.7,
+                metadata={'raw_response': api_response}
+            )
 
         except Exception as e:
             raise ValueError(f"Failed to parse API response: {e}")
@@ -387,9 +485,11 @@ Respond in JSON format:
 
         try:
             content = response.get('choices', [{}])[0].get('message', {}).get('content', '{}')
-            return json.loads(content)
+            result = _extract_json_object(content)
         except:
-            return {'valid': False, 'suggestions': []}
+            result = None
+
+        return result if result is not None else {'valid': False, 'suggestions': []}
 
     def is_available(self) -> bool:
         """Check if LLM client is available and configured."""
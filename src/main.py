@@ -7,19 +7,20 @@ import asyncio
 import yaml
 import time
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from tqdm import tqdm
 import logging
 
-from database import ReviewDatabase, Chunk, ReviewRecord, CrossReference
+from database import (ReviewDatabase, Chunk, ReviewRecord, CrossReference,
+                      DEFAULT_READER_CONNECTIONS)
 from extraction import PDFExtractor
 from review_language import LanguageReviewer
 from review_crossref import CrossReferenceValidator
 from review_tables import TableFigureReviewer
 from llm_client import LLMClient
 from output import MarkdownGenerator
-from changes_diff import ChangesDiffGenerator
+from changes_diff import ChangesDiffGenerator, grammar_category
 
 
 # Setup logging
@@ -38,7 +39,11 @@ class DatasheetReviewSystem:
         self.config = self._load_config(config_path)
 
         # Initialize components
-        self.db = ReviewDatabase(self.config.get('database', {}).get('path', 'review_state.db'))
+        db_config = self.config.get('database', {})
+        self.db = ReviewDatabase(
+            db_config.get('path', 'review_state.db'),
+            reader_connections=db_config.get('reader_connections', DEFAULT_READER_CONNECTIONS)
+        )
         self.extractor = PDFExtractor(self.config)
         self.language_reviewer = LanguageReviewer(self.config)
         self.crossref_validator = CrossReferenceValidator(self.config)
@@ -163,6 +168,7 @@ class DatasheetReviewSystem:
             if self.llm_client:
                 logger.info(f"LLM Calls: {self.llm_calls['total_calls']} total, {self.llm_calls['successful_calls']} successful, {self.llm_calls['failed_calls']} failed")
                 logger.info(f"LLM Enhanced: {self.llm_calls['chunks_enhanced']} chunks improved by LLM")
+                logger.info(f"LLM Cache: {self.llm_client.cache_hits} responses reused")
 
             logger.info(f"Output: {output_path}")
             logger.info(f"Summary: {summary_path}")
@@ -199,9 +205,10 @@ class DatasheetReviewSystem:
             logger.info(f"Using {len(self.extractor.toc_sections)} section numbers from PDF TOC")
             self.crossref_validator.update_targets('section', self.extractor.toc_sections)
 
-        # Store chunks in database
-        for chunk in tqdm(extracted_chunks, desc="Storing chunks"):
-            db_chunk = Chunk(
+        # Store chunks in database (one batched insert and commit, one timestamp)
+        created_at = datetime.now().isoformat()
+        db_chunks = [
+            Chunk(
                 chunk_id=chunk.chunk_id,
                 document_id=document_id,
                 content=chunk.content,
@@ -210,9 +217,11 @@ class DatasheetReviewSystem:
                 section_hierarchy=chunk.section_hierarchy,
                 chunk_type=chunk.chunk_type,
                 metadata=chunk.metadata,
-                created_at=datetime.now().isoformat()
+                created_at=created_at
             )
-            await self.db.insert_chunk(db_chunk)
+            for chunk in extracted_chunks
+        ]
+        await self.db.insert_chunks(db_chunks)
 
         # Update document chunk count
         await self.db.update_document_chunks(document_id, len(extracted_chunks))
@@ -222,74 +231,103 @@ class DatasheetReviewSystem:
         return extracted_chunks
 
     async def _review_chunks(self, chunks: List, document_id: str):
-        """Review all chunks."""
-        total_confidence = 0.0
-        completed = 0
+        """Review all chunks, overlapping LLM round-trips across chunks."""
+        # Bound in-flight chunk reviews; LLMClient additionally rate-limits the API calls
+        concurrency = self.config.get('llm', {}).get('rate_limit', {}).get('concurrent_requests', 5)
+        semaphore = asyncio.Semaphore(concurrency)
+        progress = tqdm(total=len(chunks), desc="Reviewing chunks")
+
+        async def review_one(chunk) -> Optional[Tuple[float, List[CrossReference]]]:
+            async with semaphore:
+                try:
+                    return await self._review_chunk(chunk)
+                except Exception as e:
+                    logger.error(f"Error reviewing chunk {chunk.chunk_id}: {e}")
+                    self.stats['processing']['failed'] += 1
+                    return None
+                finally:
+                    progress.update(1)
+
+        results = await asyncio.gather(*(review_one(chunk) for chunk in chunks))
+        progress.close()
+
+        completed_results = [r for r in results if r is not None]
+        completed_confidences = [confidence for confidence, _ in completed_results]
+
+        # Reviews finish in any order; store cross-references in chunk order so
+        # get_cross_references() (insertion order) is stable across runs
+        await self.db.insert_cross_references([
+            crossref for _, crossrefs in completed_results for crossref in crossrefs
+        ])
+        completed = len(completed_confidences)
 
-        for chunk in tqdm(chunks, desc="Reviewing chunks"):
-            try:
-                # Perform appropriate review based on chunk type
-                if chunk.chunk_type == 'text':
-                    reviewed_content, changes, confidence = await self._review_text_chunk(chunk)
-                elif chunk.chunk_type == 'table':
-                    reviewed_content, changes, confidence = await self._review_table_chunk(chunk)
-                elif chunk.chunk_type == 'figure':
-                    reviewed_content, changes, confidence = await self._review_figure_chunk(chunk)
-                else:
-                    reviewed_content = chunk.content
-                    changes = []
-                    confidence = 1.0
-
-                # Create review record
-                review = ReviewRecord(
-                    review_id=f"review_{chunk.chunk_id}_{datetime.now().timestamp()}",
-                    chunk_id=chunk.chunk_id,
-                    status='completed',
-                    original_content=chunk.content,
-                    reviewed_content=reviewed_content,
-                    changes=changes,
-                    confidence_score=confidence,
-                    reviewer='system',
-                    created_at=datetime.now().isoformat(),
-                    updated_at=datetime.now().isoformat()
-                )
+        self.stats['processing']['completed'] = completed
+        if completed > 0:
+            self.stats['processing']['avg_confidence'] = sum(completed_confidences) / completed
 
-                await self.db.insert_review(review)
+    async def _review_chunk(self, chunk) -> Tuple[float, List[CrossReference]]:
+        """
+        Review a single chunk and store the result.
 
-                # Extract cross-references
-                refs = self.crossref_validator.extract_references(
-                    chunk.content,
-                    chunk.chunk_id,
-                    chunk.page_start
-                )
+        Returns:
+            The review confidence and the chunk's cross-references (stored by
+            the caller)
+        """
+        # Perform appropriate review based on chunk type
+        if chunk.chunk_type == 'text':
+            reviewed_content, changes, confidence = await self._review_text_chunk(chunk)
+        elif chunk.chunk_type == 'table':
+            reviewed_content, changes, confidence = await self._review_table_chunk(chunk)
+        elif chunk.chunk_type == 'figure':
+            reviewed_content, changes, confidence = await self._review_figure_chunk(chunk)
+        else:
+            reviewed_content = chunk.content
+            changes = []
+            confidence = 1.0
+
+        # Create review record
+        now = datetime.now()
+        review = ReviewRecord(
+            review_id=f"review_{chunk.chunk_id}_{now.timestamp()}",
+            chunk_id=chunk.chunk_id,
+            status='completed',
+            original_content=chunk.content,
+            reviewed_content=reviewed_content,
+            changes=changes,
+            confidence_score=confidence,
+            reviewer='system',
+            created_at=now.isoformat(),
+            updated_at=now.isoformat()
+        )
 
-                for ref in refs:
-                    crossref = CrossReference(
-                        ref_id=ref.ref_id,
-                        chunk_id=ref.chunk_id,
-                        reference_text=ref.reference_text,
-                        reference_type=ref.reference_type,
-                        target_id=ref.target_number,
-                        is_valid=False,  # Will be validated later
-                        page_number=ref.page_number
-                    )
-                    await self.db.insert_cross_reference(crossref)
-
-                # Extract targets for cross-reference validation
-                targets = self.crossref_validator.extract_targets(chunk.content, chunk.chunk_type)
-                if targets:
-                    self.crossref_validator.update_targets(chunk.chunk_type, targets)
-
-                total_confidence += confidence
-                completed += 1
+        await self.db.insert_review(review)
 
-            except Exception as e:
-                logger.error(f"Error reviewing chunk {chunk.chunk_id}: {e}")
-                self.stats['processing']['failed'] += 1
+        # Extract cross-references
+        refs = self.crossref_validator.extract_references(
+            chunk.content,
+            chunk.chunk_id,
+            chunk.page_start
+        )
 
-        self.stats['processing']['completed'] = completed
-        if completed > 0:
-            self.stats['processing']['avg_confidence'] = total_confidence / completed
+        crossrefs = [
+            CrossReference(
+                ref_id=ref.ref_id,
+                chunk_id=ref.chunk_id,
+                reference_text=ref.reference_text,
+                reference_type=ref.reference_type,
+                target_id=ref.target_number,
+                is_valid=False,  # Will be validated later
+                page_number=ref.page_number
+            )
+            for ref in refs
+        ]
+
+        # Extract targets for cross-reference validation
+        targets = self.crossref_validator.extract_targets(chunk.content, chunk.chunk_type)
+        if targets:
+            self.crossref_validator.update_targets(chunk.chunk_type, targets)
+
+        return confidence, crossrefs
 
     async def _review_text_chunk(self, chunk) -> tuple:
         """Review a text chunk (with optional LLM enhancement)."""
@@ -392,6 +430,11 @@ class DatasheetReviewSystem:
             for c in changes
         ]
 
+        # Tag grammar fixes with their summary category so the diff summary can bucket them directly
+        for change in changes_dict:
+            if change['type'] == 'grammar':
+                change['category'] = grammar_category(change['reason'])
+
         return reviewed_content, changes_dict, confidence
 
     async def _review_table_chunk(self, chunk) -> tuple:
@@ -477,9 +520,10 @@ class DatasheetReviewSystem:
         # Validate references
         validated_refs = self.crossref_validator.validate_references(references)
 
-        # Update database
-        for ref in validated_refs:
-            await self.db.update_crossref_validity(ref.ref_id, ref.is_valid, ref.target_id)
+        # Update database (one commit for all references)
+        async with self.db.transaction():
+            for ref in validated_refs:
+                await self.db.update_crossref_validity(ref.ref_id, ref.is_valid, ref.target_id)
 
         # Generate report
         report = self.crossref_validator.generate_reference_report(validated_refs)
@@ -496,10 +540,11 @@ class DatasheetReviewSystem:
         """Generate final markdown output."""
         # Get all chunks with reviews
         all_chunks = await self.db.get_all_chunks(document_id)
+        reviews = await self.db.get_reviews_by_chunks([chunk.chunk_id for chunk in all_chunks])
 
         chunks_data = []
         for chunk in all_chunks:
-            review = await self.db.get_review(chunk.chunk_id)
+            review = reviews.get(chunk.chunk_id)
 
             chunk_dict = {
                 'chunk_id': chunk.chunk_id,
@@ -9,7 +9,35 @@ from dataclasses import dataclass
 import hashlib
 
 
-@dataclass
+# Target patterns (what can be referenced), compiled once at import
+# IMPROVED: Extract figure numbers from multiple formats
+FIGURE_TARGET_PATTERNS = [
+    re.compile(r'\[Figure\s+(\d+(?:-\d+)?)\]'),       # [Figure 3-3] or [Figure 1]
+    re.compile(r'Figure\s+(\d+(?:-\d+)?)[:\.]'),      # Figure 3-3: caption
+    re.compile(r'(?:^|\n)Figure\s+(\d+(?:-\d+)?)'),   # Figure 3-3 at line start
+    re.compile(r'Fig\.\s+(\d+(?:-\d+)?)'),            # Fig. 3-3
+]
+
+# IMPROVED: Extract table numbers from multiple formats
+TABLE_TARGET_PATTERNS = [
+    re.compile(r'\[Table\s+(\d+(?:-\d+)?)\]'),        # [Table 3-3] or [Table 1]
+    re.compile(r'Table\s+(\d+(?:-\d+)?)[:\.]'),       # Table 3-3: caption
+    re.compile(r'TABLE\s+(\d+(?:-\d+)?)[:\.]'),       # TABLE 3-3: caption
+    re.compile(r'(?:^|\n)Table\s+(\d+(?:-\d+)?)'),    # Table at line start
+]
+
+# IMPROVED: Extract section numbers from multiple formats (aligned with extraction.py)
+SECTION_TARGET_PATTERNS = [
+    re.compile(r'^(\d+(?:\.\d+)*)\s+[A-Z]', re.MULTILINE),           # "1.2.3 TITLE"
+    re.compile(r'^(\d+(?:\.\d+)*)\s+[a-z]', re.MULTILINE),           # "1.2.3 introduction"
+    re.compile(r'(?:^|\n)\s*(\d+(?:\.\d+)*)\s+\w+', re.MULTILINE),   # Number + any word
+    re.compile(r'SECTION\s+(\d+(?:\.\d+)*)', re.MULTILINE),          # "SECTION 3.1"
+    re.compile(r'Section\s+(\d+(?:\.\d+)*)', re.MULTILINE),          # "Section 3.1"
+    re.compile(r'^##+\s*(\d+(?:\.\d+)*)', re.MULTILINE),             # Markdown headings
+]
+
+
+@dataclass(slots=True)
 class Reference:
     """Represents a cross-reference."""
     ref_id: str
@@ -56,6 +84,12 @@ class CrossReferenceValidator:
             ]
         }
 
+        # Compile reference patterns once rather than on every chunk
+        self.compiled_patterns = {
+            ref_type: [re.compile(pattern) for pattern in patterns]
+            for ref_type, patterns in self.patterns.items()
+        }
+
         # Track all targets found in document
         self.targets = {
             'section': set(),
@@ -82,9 +116,9 @@ class CrossReferenceValidator:
 
         references = []
 
-        for ref_type, patterns in self.patterns.items():
+        for ref_type, patterns in self.compiled_patterns.items():
             for pattern in patterns:
-                matches = re.finditer(pattern, content)
+                matches = pattern.finditer(content)
 
                 for match in matches:
                     target_number = match.group(1)
@@ -119,44 +153,15 @@ class CrossReferenceValidator:
         targets = set()
 
         if chunk_type == 'figure':
-            # IMPROVED: Extract figure numbers from multiple formats
-            figure_patterns = [
-                r'\[Figure\s+(\d+(?:-\d+)?)\]',       # [Figure 3-3] or [Figure 1]
-                r'Figure\s+(\d+(?:-\d+)?)[:\.]',      # Figure 3-3: caption
-                r'(?:^|\n)Figure\s+(\d+(?:-\d+)?)',   # Figure 3-3 at line start
-                r'Fig\.\s+(\d+(?:-\d+)?)',            # Fig. 3-3
-            ]
-            for pattern in figure_patterns:
-                for match in re.finditer(pattern, content):
-                    targets.add(match.group(1))
-
+            patterns = FIGURE_TARGET_PATTERNS
         elif chunk_type == 'table':
-            # IMPROVED: Extract table numbers from multiple formats
-            table_patterns = [
-                r'\[Table\s+(\d+(?:-\d+)?)\]',        # [Table 3-3] or [Table 1]
-                r'Table\s+(\d+(?:-\d+)?)[:\.]',       # Table 3-3: caption
-                r'TABLE\s+(\d+(?:-\d+)?)[:\.]',       # TABLE 3-3: caption
-                r'(?:^|\n)Table\s+(\d+(?:-\d+)?)',    # Table at line start
-            ]
-            for pattern in table_patterns:
-                for match in re.finditer(pattern, content):
-                    targets.add(match.group(1))
-
+            patterns = TABLE_TARGET_PATTERNS
         else:
-            # IMPROVED: Extract section numbers from multiple formats (aligned with extraction.py)
-            section_patterns = [
-                r'^(\d+(?:\.\d+)*)\s+[A-Z]',           # "1.2.3 TITLE"
-                r'^(\d+(?:\.\d+)*)\s+[a-z]',           # "1.2.3 introduction"
-                r'(?:^|\n)\s*(\d+(?:\.\d+)*)\s+\w+',   # Number + any word
-                r'SECTION\s+(\d+(?:\.\d+)*)',          # "SECTION 3.1"
-                r'Section\s+(\d+(?:\.\d+)*)',          # "Section 3.1"
-                r'^##+\s*(\d+(?:\.\d+)*)',             # Markdown headings
-            ]
+            patterns = SECTION_TARGET_PATTERNS
 
-            for pattern in section_patterns:
-                matches = re.finditer(pattern, content, re.MULTILINE)
-                for match in matches:
-                    targets.add(match.group(1))
+        for pattern in patterns:
+            for match in pattern.finditer(content):
+                targets.add(match.group(1))
 
         return targets
 
@@ -298,31 +303,62 @@ class CrossReferenceValidator:
             Dictionary with reference statistics including confidence breakdown
         """
         total = len(references)
-        valid = sum(1 for ref in references if ref.is_valid)
-        invalid = total - valid
+        valid = 0
 
         # IMPROVED: Confidence-based categorization
-        exact_matches = sum(1 for ref in references if ref.confidence == 1.0)
-        high_confidence = sum(1 for ref in references if 0.85 <= ref.confidence < 1.0)
-        medium_confidence = sum(1 for ref in references if 0.7 <= ref.confidence < 0.85)
-        low_confidence = sum(1 for ref in references if 0.0 < ref.confidence < 0.7)
-        broken = sum(1 for ref in references if ref.confidence == 0.0)
-
+        # Single pass: count buckets and collect only the references listed in the report
+        exact_matches = high_confidence = medium_confidence = low_confidence = broken = 0
         by_type = {}
-        for ref in references:
-            if ref.reference_type not in by_type:
-                by_type[ref.reference_type] = {'total': 0, 'valid': 0, 'invalid': 0}
+        uncertain_references = []
+        broken_references = []
 
-            by_type[ref.reference_type]['total'] += 1
+        for ref in references:
+            confidence = ref.confidence
+            if confidence == 1.0:
+                exact_matches += 1
+            elif 0.85 <= confidence < 1.0:
+                high_confidence += 1
+            elif 0.7 <= confidence < 0.85:
+                medium_confidence += 1
+            elif 0.0 < confidence < 0.7:
+                low_confidence += 1
+            elif confidence == 0.0:
+                broken += 1
+
+            type_stats = by_type.get(ref.reference_type)
+            if type_stats is None:
+                type_stats = by_type[ref.reference_type] = {'total': 0, 'valid': 0, 'invalid': 0}
+
+            type_stats['total'] += 1
             if ref.is_valid:
-                by_type[ref.reference_type]['valid'] += 1
+                valid += 1
+                type_stats['valid'] += 1
             else:
-                by_type[ref.reference_type]['invalid'] += 1
+                type_stats['invalid'] += 1
+                broken_references.append({
+                    'text': ref.reference_text,
+                    'type': ref.reference_type,
+                    'target': ref.target_number,
+                    'page': ref.page_number,
+                    'chunk_id': ref.chunk_id,
+                    'suggestions': self.suggest_corrections(ref)
+                })
+
+            if 0.0 < confidence < 0.8:  # Uncertain matches
+                uncertain_references.append({
+                    'text': ref.reference_text,
+                    'type': ref.reference_type,
+                    'target': ref.target_number,
+                    'page': ref.page_number,
+                    'confidence': confidence,
+                    'match_reason': ref.match_reason,
+                    'chunk_id': ref.chunk_id
+                })
 
         return {
             'total_references': total,
             'valid_references': valid,
-            'invalid_references': invalid,
+            'invalid_references': total - valid,
             'confidence_breakdown': {
                 'exact_match': exact_matches,
                 'high_confidence': high_confidence,  # 0.85-0.99
@@ -331,29 +367,8 @@ class CrossReferenceValidator:
                 'broken': broken  # 0.0
             },
             'by_type': by_type,
-            'uncertain_references': [
-                {
-                    'text': ref.reference_text,
-                    'type': ref.reference_type,
-                    'target': ref.target_number,
-                    'page': ref.page_number,
-                    'confidence': ref.confidence,
-                    'match_reason': ref.match_reason,
-                    'chunk_id': ref.chunk_id
-                }
-                for ref in references if 0.0 < ref.confidence < 0.8  # Uncertain matches
-            ],
-            'broken_references': [
-                {
-                    'text': ref.reference_text,
-                    'type': ref.reference_type,
-                    'target': ref.target_number,
-                    'page': ref.page_number,
-                    'chunk_id': ref.chunk_id,
-                    'suggestions': self.suggest_corrections(ref)
-                }
-                for ref in self.get_broken_references(references)
-            ]
+            'uncertain_references': uncertain_references,
+            'broken_references': broken_references
         }
 
     def update_targets(self, ref_type: str, targets: Set[str]):
@@ -9,7 +9,16 @@ from dataclasses import dataclass
 import difflib
 
 
-@dataclass
+# Grammar and style patterns, compiled once and shared by all reviewers
+DOUBLE_SPACE_PATTERN = re.compile(r'  +')
+MISSING_SPACE_PATTERN = re.compile(r'([.!?,;:])([A-Z])')
+# FIXED: Only match within same line (no newlines) to avoid breaking
+# list continuations like "Curve25519\n- 512"
+# Use [ \t]+ instead of \s+ to match spaces/tabs but not newlines
+RANGE_PATTERN = re.compile(r'(\d+)[ \t]+-[ \t]+(\d+)')
+
+
+@dataclass(slots=True)
 class LanguageChange:
     """Represents a language correction change."""
     change_type: str  # 'spelling', 'grammar', 'style'
@@ -46,6 +55,12 @@ class LanguageReviewer:
             'nad': 'and',
         }
 
+        # Word boundary pattern per typo to avoid partial matches
+        self.typo_patterns = [
+            (re.compile(r'\b' + re.escape(typo) + r'\b', re.IGNORECASE), correction)
+            for typo, correction in self.common_typos.items()
+        ]
+
     def _load_technical_terms(self) -> set:
         """Load technical terms that should be ignored."""
         # Common technical terms for electronics/microcontrollers
@@ -104,10 +119,8 @@ class LanguageReviewer:
         corrected = text
 
         # Check for common typos
-        for typo, correction in self.common_typos.items():
-            # Word boundary pattern to avoid partial matches
-            pattern = r'\b' + re.escape(typo) + r'\b'
-            matches = list(re.finditer(pattern, corrected, re.IGNORECASE))
+        for pattern, correction in self.typo_patterns:
+            matches = list(pattern.finditer(corrected))
 
             for match in reversed(matches):  # Reverse to maintain positions
                 original_word = match.group(0)
@@ -141,8 +154,7 @@ class LanguageReviewer:
         corrected = text
 
         # Check for double spaces
-        double_space_pattern = r'  +'
-        matches = list(re.finditer(double_space_pattern, corrected))
+        matches = list(DOUBLE_SPACE_PATTERN.finditer(corrected))
 
         for match in reversed(matches):
             changes.append(LanguageChange(
@@ -156,8 +168,7 @@ class LanguageReviewer:
             corrected = corrected[:match.start()] + ' ' + corrected[match.end():]
 
         # Check for missing space after punctuation
-        punct_pattern = r'([.!?,;:])([A-Z])'
-        matches = list(re.finditer(punct_pattern, corrected))
+        matches = list(MISSING_SPACE_PATTERN.finditer(corrected))
 
         for match in reversed(matches):
             original = match.group(0)
@@ -182,11 +193,7 @@ class LanguageReviewer:
 
         # Check for inconsistent spacing around hyphens in ranges
         # e.g., "1 - 5" should be "1-5" or "1 – 5" (en dash)
-        # FIXED: Only match within same line (no newlines) to avoid breaking
-        # list continuations like "Curve25519\n- 512"
-        # Use [ \t]+ instead of \s+ to match spaces/tabs but not newlines
-        range_pattern = r'(\d+)[ \t]+-[ \t]+(\d+)'
-        matches = list(re.finditer(range_pattern, corrected))
+        matches = list(RANGE_PATTERN.finditer(corrected))
 
         for match in reversed(matches):
             original = match.group(0)
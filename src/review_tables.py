@@ -8,7 +8,7 @@ from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class TableIssue:
     """Represents an issue found in a table."""
     issue_type: str  # 'formatting', 'missing_data', 'inconsistent_columns'
@@ -18,7 +18,7 @@ class TableIssue:
     severity: str = 'medium'  # 'low', 'medium', 'high'
 
 
-@dataclass
+@dataclass(slots=True)
 class FigureIssue:
     """Represents an issue found with a figure."""
     issue_type: str  # 'missing_caption', 'low_resolution', 'broken_reference'
@@ -267,7 +267,7 @@ class SemanticDiffMatcher:
         Returns:
             List of (section_v1, section_v2, similarity_score) tuples
         """
-        if not self.embedding_generator.is_available():
+        if not self.embedding_generator.is_available() or not sections_v1 or not sections_v2:
             return []
 
         alignments = []
@@ -276,31 +276,23 @@ class SemanticDiffMatcher:
         texts_v1 = [s['content'] for s in sections_v1]
         texts_v2 = [s['content'] for s in sections_v2]
 
-        emb_v1 = self.embedding_generator.encode(texts_v1)
-        emb_v2 = self.embedding_generator.encode(texts_v2)
+        emb_all = self.embedding_generator.encode(texts_v1 + texts_v2)
 
-        if emb_v1 is None or emb_v2 is None:
+        if emb_all is None:
             return []
 
-        # For each section in v1, find best match in v2
-        import numpy as np
-
-        for i, section_v1 in enumerate(sections_v1):
-            best_similarity = -1
-            best_match_idx = -1
+        emb_v1, emb_v2 = emb_all[:len(texts_v1)], emb_all[len(texts_v1):]
 
-            # Calculate similarity with all v2 sections
-            for j in range(len(sections_v2)):
-                similarity = np.dot(emb_v1[i], emb_v2[j]) / (
-                    np.linalg.norm(emb_v1[i]) * np.linalg.norm(emb_v2[j])
-                )
+        # Cosine similarity of every (v1, v2) pair; embeddings are unit vectors
+        similarities = emb_v1 @ emb_v2.T
 
-                if similarity > best_similarity:
-                    best_similarity = similarity
-                    best_match_idx = j
+        # For each section in v1, find best match in v2
+        for i, section_v1 in enumerate(sections_v1):
+            best_match_idx = int(similarities[i].argmax())
+            best_similarity = similarities[i, best_match_idx]
 
             # Add alignment if above threshold
-            if best_similarity >= similarity_threshold and best_match_idx >= 0:
+            if best_similarity >= similarity_threshold:
                 alignments.append((
                     section_v1,
                     sections_v2[best_match_idx],
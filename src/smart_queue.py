@@ -4,6 +4,7 @@ Optimizes human review by leveraging rule-based + LLM hybrid approach.
 """
 
 import asyncio
+from collections import OrderedDict
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 from datetime import datetime
@@ -46,6 +47,11 @@ class SmartReviewQueue:
         self.pattern_library = PatternLibrary(config)
         self.use_context = config.get('smart_queue', {}).get('use_context_retrieval', True)
 
+        # LRU cache of context lookups, keyed by chunk content (boilerplate
+        # sections repeat across datasheets and hit the same patterns)
+        self.context_cache_size = config.get('smart_queue', {}).get('context_cache_size', 4096)
+        self._context_cache: OrderedDict[str, Optional[Dict]] = OrderedDict()
+
     async def process_with_api(self, document_id: str, api_client) -> Dict:
         """
         Process document with intelligent API integration.
@@ -71,9 +77,13 @@ class SmartReviewQueue:
             auto_approve = []
             api_queue = []
 
+            # Two batched lookups instead of two queries per chunk
+            reviews = await self.db.get_reviews_by_chunks(pending)
+            chunks = {chunk.chunk_id: chunk for chunk in await self.db.get_chunks_by_ids(pending)}
+
             for chunk_id in pending:
-                review = await self.db.get_review(chunk_id)
-                chunk = await self.db.get_chunk(chunk_id)
+                review = reviews.get(chunk_id)
+                chunk = chunks.get(chunk_id)
 
                 if review and review.confidence_score > 0.95:
                     # High confidence - auto-approve
@@ -304,9 +314,10 @@ class SmartReviewQueue:
         try:
             all_reviews = []
             chunks = await self.db.get_all_chunks(document_id)
+            reviews = await self.db.get_reviews_by_chunks([chunk.chunk_id for chunk in chunks])
 
             for chunk in chunks:
-                review = await self.db.get_review(chunk.chunk_id)
+                review = reviews.get(chunk.chunk_id)
 
                 if review and review.confidence_score < 0.9:
                     all_reviews.append({
@@ -361,6 +372,10 @@ class SmartReviewQueue:
         if not self.use_context or not self.semantic_search.is_available():
             return None
 
+        if content in self._context_cache:
+            self._context_cache.move_to_end(content)
+            return self._context_cache[content]
+
         try:
             # Find similar patterns from pattern library
             patterns = self.pattern_library.find_similar_patterns(content, n_results=3)
@@ -368,17 +383,24 @@ class SmartReviewQueue:
             # Get pattern suggestion
             suggestion = self.pattern_library.suggest_correction(content, threshold=0.85)
 
-            if patterns or suggestion:
-                return {
-                    'similar_patterns': patterns[:2] if patterns else [],  # Top 2 patterns
-                    'suggested_correction': suggestion,
-                    'confidence_boost': len(patterns) * 0.05  # Small boost for having historical data
-                }
-
         except Exception as e:
+            # Errors are not cached so the lookup is retried next time
             print(f"⚠️ Error retrieving context: {e}")
+            return None
+
+        context = None
+        if patterns or suggestion:
+            context = {
+                'similar_patterns': patterns[:2] if patterns else [],  # Top 2 patterns
+                'suggested_correction': suggestion,
+                'confidence_boost': len(patterns) * 0.05  # Small boost for having historical data
+            }
+
+        self._context_cache[content] = context
+        if len(self._context_cache) > self.context_cache_size:
+            self._context_cache.popitem(last=False)
 
-        return None
+        return context
 
 
 # Example integration with your internal API
@@ -0,0 +1,22 @@
+"""
+Shared pytest setup: make the modules in src/ importable and provide a
+temporary review database.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from database import ReviewDatabase  # noqa: E402
+
+
+@pytest.fixture
+async def db(tmp_path):
+    """A connected ReviewDatabase on a temporary file (with reader connections)."""
+    database = ReviewDatabase(str(tmp_path / "review_state.db"))
+    await database.connect()
+    yield database
+    await database.close()
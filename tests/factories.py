@@ -0,0 +1,42 @@
+"""
+Builders for database records used across tests.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from database import Chunk, ReviewRecord
+
+TIMESTAMP = "2024-01-01T00:00:00"
+
+
+def make_chunk(chunk_id: str, document_id: str = "doc", content: str = "Sample text.",
+               page: int = 1, section: str = "1.0 Introduction",
+               chunk_type: str = "text", metadata: Optional[Dict[str, Any]] = None) -> Chunk:
+    return Chunk(
+        chunk_id=chunk_id,
+        document_id=document_id,
+        content=content,
+        page_start=page,
+        page_end=page,
+        section_hierarchy=section,
+        chunk_type=chunk_type,
+        metadata=metadata or {},
+        created_at=TIMESTAMP,
+    )
+
+
+def make_review(chunk_id: str, changes: Optional[List[Dict[str, Any]]] = None,
+                status: str = "completed", review_id: Optional[str] = None,
+                updated_at: str = TIMESTAMP) -> ReviewRecord:
+    return ReviewRecord(
+        review_id=review_id or f"review_{chunk_id}",
+        chunk_id=chunk_id,
+        status=status,
+        original_content="original",
+        reviewed_content="reviewed",
+        changes=changes or [],
+        confidence_score=0.9,
+        reviewer="llm",
+        created_at=TIMESTAMP,
+        updated_at=updated_at,
+    )
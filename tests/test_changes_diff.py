@@ -0,0 +1,111 @@
+"""
+Tests for diff summary generation and its review-section cache.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import changes_diff
+from changes_diff import ChangesDiffGenerator
+from factories import make_chunk, make_review
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Advance changes_diff's clock one second per call, so filenames never collide."""
+    ticks = iter(START + timedelta(seconds=i) for i in range(1000))
+
+    class FakeDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return next(ticks)
+
+    monkeypatch.setattr(changes_diff, 'datetime', FakeDatetime)
+
+
+@pytest.fixture
+async def reviewed_db(db):
+    await db.insert_chunks([make_chunk("c1", page=1), make_chunk("c2", page=2)])
+    await db.insert_reviews([
+        make_review("c1", [{"type": "spelling", "original": "teh", "corrected": "the"}]),
+        make_review("c2", [{"type": "grammar", "original": "a", "corrected": "an",
+                            "reason": "article before vowel"}]),
+    ])
+    return db
+
+
+def make_generator(tmp_path, cache: bool) -> ChangesDiffGenerator:
+    return ChangesDiffGenerator({'output': {'output_dir': str(tmp_path / "out"),
+                                            'cache_diff_summary': cache}})
+
+
+def stats_and_timing(total_time: float):
+    stats = {'document': {'filename': 'doc.pdf', 'total_pages': 2}}
+    return stats, {'total_time': total_time, 'pages_per_second': 1.0}
+
+
+async def test_caching_is_off_by_default_and_names_are_timestamped(tmp_path, reviewed_db, clock):
+    generator = ChangesDiffGenerator({'output': {'output_dir': str(tmp_path / "out")}})
+    stats, timing = stats_and_timing(10.0)
+
+    path = await generator.generate_diff_summary(reviewed_db, "doc", stats, timing)
+
+    assert path.endswith("changes_diff_doc_20240101_120000.md")
+    assert not (tmp_path / "out" / ".diff_cache").exists()
+
+
+async def test_cache_hit_reuses_changes_but_renders_run_sections_fresh(tmp_path, reviewed_db,
+                                                                       clock, monkeypatch):
+    generator = make_generator(tmp_path, cache=True)
+    first = await generator.generate_diff_summary(reviewed_db, "doc", *stats_and_timing(10.0))
+
+    # Unchanged reviews: the changes must come from the cache, not the database
+    async def fail(*args, **kwargs):
+        raise AssertionError("changes re-extracted on a cache hit")
+    monkeypatch.setattr(generator, '_extract_changes', fail)
+    second = await generator.generate_diff_summary(reviewed_db, "doc", *stats_and_timing(120.0))
+
+    assert first != second
+    first_text = open(first, encoding='utf-8').read()
+    second_text = open(second, encoding='utf-8').read()
+    assert "**Generated:** 2024-01-01 12:00:00" in first_text
+    assert "**Generated:** 2024-01-01 12:00:01" in second_text
+    assert "**Total Time:** 120.0 seconds" in second_text
+    # Fresh header/ROI aside, the review-derived sections are identical
+    assert first_text.split("---", 2)[2].split("## ROI")[0] == \
+        second_text.split("---", 2)[2].split("## ROI")[0]
+    assert "teh" in second_text
+
+
+async def test_updated_review_misses_the_cache(tmp_path, reviewed_db, clock):
+    generator = make_generator(tmp_path, cache=True)
+    stats, timing = stats_and_timing(10.0)
+    await generator.generate_diff_summary(reviewed_db, "doc", stats, timing)
+
+    await reviewed_db.insert_review(make_review(
+        "c1", [{"type": "spelling", "original": "recieve", "corrected": "receive"}],
+        updated_at="2024-01-02T00:00:00"
+    ))
+    path = await generator.generate_diff_summary(reviewed_db, "doc", stats, timing)
+
+    text = open(path, encoding='utf-8').read()
+    assert "recieve" in text
+    assert "teh" not in text
+    # The document's previous cache entry is replaced, not kept alongside
+    assert [p.name for p in (tmp_path / "out" / ".diff_cache").iterdir()] == ["changes_doc.md"]
+
+
+async def test_cached_and_uncached_summaries_match(tmp_path, reviewed_db, clock):
+    stats, timing = stats_and_timing(10.0)
+    uncached = await make_generator(tmp_path / "a", cache=False).generate_diff_summary(
+        reviewed_db, "doc", stats, timing)
+    cached = await make_generator(tmp_path / "b", cache=True).generate_diff_summary(
+        reviewed_db, "doc", stats, timing)
+
+    # Same content apart from the timestamp in the header
+    uncached_text = open(uncached, encoding='utf-8').read().replace("12:00:00", "T")
+    cached_text = open(cached, encoding='utf-8').read().replace("12:00:01", "T")
+    assert uncached_text == cached_text
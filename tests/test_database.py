@@ -0,0 +1,309 @@
+"""
+Tests for ReviewDatabase against a temporary SQLite file.
+"""
+
+import asyncio
+import sqlite3
+
+import numpy as np
+import pytest
+
+from database import ReviewDatabase
+from factories import make_chunk, make_review
+
+
+def _change(change_type, original, corrected):
+    return {"type": change_type, "original": original, "corrected": corrected}
+
+
+# Chunk queries
+
+async def test_iter_chunks_matches_get_all_chunks_across_batches(db):
+    await db.insert_chunks([
+        make_chunk(f"c{i}", page=page) for i, page in enumerate([3, 1, 2, 1, 3])
+    ])
+    await db.insert_chunks([make_chunk("other", document_id="other_doc")])
+
+    streamed = [chunk async for chunk in db.iter_chunks("doc", batch_size=2)]
+
+    assert streamed == await db.get_all_chunks("doc")
+    assert [c.chunk_id for c in streamed] == ["c1", "c3", "c2", "c0", "c4"]
+
+
+async def test_iter_chunks_allows_reads_inside_the_loop(tmp_path):
+    database = ReviewDatabase(str(tmp_path / "review_state.db"), reader_connections=1)
+    await database.connect()
+    try:
+        await database.insert_chunks([make_chunk(f"c{i}") for i in range(5)])
+        await database.insert_reviews([make_review(f"c{i}") for i in range(5)])
+
+        async def iterate_with_nested_reads():
+            reviewed = []
+            async for chunk in database.iter_chunks("doc", batch_size=2):
+                review = await database.get_review(chunk.chunk_id)
+                reviewed.append(review.chunk_id)
+            return reviewed
+
+        # The only reader must not stay checked out across the yields
+        reviewed = await asyncio.wait_for(iterate_with_nested_reads(), timeout=3)
+        assert reviewed == [f"c{i}" for i in range(5)]
+    finally:
+        await database.close()
+
+
+async def test_get_chunks_by_metadata_matches_scalar_values(db):
+    await db.insert_chunks([
+        make_chunk("good", metadata={"extraction_quality": "good", "has_table": True}),
+        make_chunk("poor", metadata={"extraction_quality": "poor", "has_table": False}),
+        make_chunk("quoted", metadata={'odd "key" \\ here': 1, "note": None}),
+        make_chunk("other", document_id="other_doc", metadata={"extraction_quality": "good"}),
+    ])
+
+    assert [c.chunk_id for c in await db.get_chunks_by_metadata("doc", "extraction_quality", "good")] == ["good"]
+    assert [c.chunk_id for c in await db.get_chunks_by_metadata("doc", "has_table", True)] == ["good"]
+    assert [c.chunk_id for c in await db.get_chunks_by_metadata("doc", 'odd "key" \\ here', 1)] == ["quoted"]
+    assert [c.chunk_id for c in await db.get_chunks_by_metadata("doc", "note", None)] == ["quoted"]
+    # Keys that are not valid JSON path labels simply match nothing
+    assert await db.get_chunks_by_metadata("doc", 'missing"', "good") == []
+    assert await db.get_chunks_by_metadata("doc", "back\\slash", "good") == []
+
+
+async def test_get_chunks_by_metadata_rejects_nested_values(db):
+    with pytest.raises(TypeError):
+        await db.get_chunks_by_metadata("doc", "bbox", [0, 0, 10, 10])
+
+
+async def test_search_chunks_ranks_matches_and_filters_by_document(db):
+    await db.insert_chunks([
+        make_chunk("osc", content="The oscillator drives the oscillator clock tree."),
+        make_chunk("adc", content="The ADC samples once per oscillator cycle."),
+        make_chunk("uart", content="The UART transmits bytes."),
+        make_chunk("other", document_id="other_doc", content="Oscillator notes."),
+    ])
+
+    assert await db.search_chunks("oscillator", document_id="doc") == ["osc", "adc"]
+    assert await db.search_chunks("oscillator", k=1, document_id="doc") == ["osc"]
+    assert set(await db.search_chunks("oscillator")) == {"osc", "adc", "other"}
+    assert await db.search_chunks("missing") == []
+
+
+async def test_search_chunks_index_follows_updates_and_deletes(db):
+    await db.insert_chunks([make_chunk("c1", content="Brown-out reset threshold.")])
+
+    await db.conn.execute(
+        "UPDATE chunks SET content = 'Watchdog timer period.' WHERE chunk_id = 'c1'"
+    )
+    await db.conn.commit()
+    assert await db.search_chunks("reset") == []
+    assert await db.search_chunks("watchdog") == ["c1"]
+
+    await db.conn.execute("DELETE FROM chunks WHERE chunk_id = 'c1'")
+    await db.conn.commit()
+    assert await db.search_chunks("watchdog") == []
+
+
+async def test_search_chunks_index_is_built_for_existing_chunks(tmp_path):
+    path = str(tmp_path / "review_state.db")
+    database = ReviewDatabase(path)
+    await database.connect()
+    await database.insert_chunks([make_chunk("c1", content="Oscillator start-up.")])
+    await database.close()
+
+    # A database from before the index: chunks present, no FTS table or triggers
+    with sqlite3.connect(path) as conn:
+        for trigger in ("chunks_ai", "chunks_ad", "chunks_au"):
+            conn.execute(f"DROP TRIGGER {trigger}")
+        conn.execute("DROP TABLE chunks_fts")
+
+    database = ReviewDatabase(path)
+    await database.connect()
+    try:
+        assert await database.search_chunks("oscillator") == ["c1"]
+    finally:
+        await database.close()
+
+
+async def test_search_by_vector_ranks_by_cosine_similarity(db):
+    await db.insert_chunks([make_chunk(f"c{i}") for i in range(4)])
+    await db.insert_chunks([make_chunk("other", document_id="other_doc")])
+    await db.insert_embeddings([
+        ("c0", [1.0, 0.0, 0.0]),
+        ("c1", [1.0, 1.0, 0.0]),
+        ("c2", [0.0, 2.0, 0.0]),
+        ("other", [1.0, 0.0, 0.0]),
+    ], "model-a")
+    await db.insert_embeddings([("c3", [1.0, 0.0, 0.0])], "model-b")
+    # Different dimension: skipped rather than compared
+    await db.insert_embeddings([("c3", [1.0, 0.0])], "model-a")
+
+    results = await db.search_by_vector([1.0, 0.0, 0.0], document_id="doc",
+                                        model_name="model-a")
+
+    assert [chunk_id for chunk_id, _ in results] == ["c0", "c1", "c2"]
+    assert [score for _, score in results] == pytest.approx([1.0, np.sqrt(0.5), 0.0])
+
+    top = await db.search_by_vector(np.array([0.0, 1.0, 0.0]), k=1, document_id="doc",
+                                    model_name="model-a")
+    assert top == [("c2", pytest.approx(1.0))]
+    assert await db.search_by_vector([1.0, 0.0, 0.0], k=0) == []
+
+
+# Review queries
+
+async def test_get_reviews_for_document_in_chunk_order(db):
+    await db.insert_chunks([
+        make_chunk("late", page=2), make_chunk("b", page=1), make_chunk("a", page=1),
+        make_chunk("unreviewed", page=1),
+        make_chunk("other", document_id="other_doc"),
+    ])
+    await db.insert_reviews([make_review(chunk_id) for chunk_id in ("late", "b", "a", "other")])
+
+    reviews = await db.get_reviews_for_document("doc")
+
+    assert [r.chunk_id for r in reviews] == ["a", "b", "late"]
+    assert reviews[0] == await db.get_review("a")
+
+
+async def test_change_counts_and_samples(db):
+    await db.insert_chunks([make_chunk("p2", page=2), make_chunk("p1", page=1),
+                            make_chunk("other", document_id="other_doc")])
+    await db.insert_reviews([
+        make_review("p1", changes=[
+            _change("spelling", "teh", "the"),
+            _change("grammar", "is", "are"),
+            _change("spelling", "recieve", "receive"),
+        ]),
+        make_review("p2", changes=[
+            _change("spelling", "teh", "the"),
+            _change("spelling", "adress", "address"),
+        ]),
+        make_review("other", changes=[_change("formatting", "a", "b")]),
+    ])
+
+    assert await db.get_change_counts_by_type("doc") == {"spelling": 4, "grammar": 1}
+
+    samples = await db.get_sample_changes("doc", "spelling")
+    assert [(c["original"], c["corrected"]) for c in samples] == [
+        ("teh", "the"), ("recieve", "receive"), ("adress", "address"),
+    ]
+    limited = await db.get_sample_changes("doc", "spelling", limit=2)
+    assert limited == samples[:2]
+    assert await db.get_sample_changes("doc", "formatting") == []
+
+
+async def test_replaced_review_is_the_only_one_counted(db):
+    await db.insert_chunks([make_chunk("c1")])
+    await db.insert_review(make_review("c1", review_id="old",
+                                       changes=[_change("spelling", "teh", "the")]))
+    await db.insert_review(make_review("c1", review_id="new", updated_at="2024-01-02T00:00:00",
+                                       changes=[_change("grammar", "is", "are")]))
+
+    assert [r.review_id for r in await db.get_reviews_for_document("doc")] == ["new"]
+    assert await db.get_change_counts_by_type("doc") == {"grammar": 1}
+
+
+async def test_unique_review_migration_moves_superseded_reviews_to_history(tmp_path):
+    path = str(tmp_path / "review_state.db")
+    database = ReviewDatabase(path)
+    await database.connect()
+    await database.insert_chunks([make_chunk("c1"), make_chunk("c2")])
+    await database.close()
+
+    # A database from before the unique index, holding superseded reviews
+    with sqlite3.connect(path) as conn:
+        conn.execute("DROP INDEX idx_reviews_chunk_id")
+        conn.executemany(
+            "INSERT INTO reviews (review_id, chunk_id, status, original_content, changes,"
+            " updated_at) VALUES (?, ?, 'completed', 'original', '[]', ?)",
+            [
+                ("c1_old", "c1", "2024-01-01T00:00:00"),
+                ("c1_new", "c1", "2024-01-03T00:00:00"),
+                ("c1_mid", "c1", "2024-01-02T00:00:00"),
+                ("c2_only", "c2", "2024-01-01T00:00:00"),
+            ],
+        )
+
+    database = ReviewDatabase(path)
+    await database.connect()
+    try:
+        reviews = await database.get_reviews_for_document("doc")
+        assert [(r.chunk_id, r.review_id) for r in reviews] == [("c1", "c1_new"), ("c2", "c2_only")]
+
+        async with database.conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = 'idx_reviews_chunk_id'"
+        ) as cursor:
+            (sql,) = await cursor.fetchone()
+        assert "UNIQUE" in sql
+
+        # Superseded reviews are kept, not deleted
+        async with database.conn.execute(
+            "SELECT review_id FROM reviews_history ORDER BY updated_at"
+        ) as cursor:
+            assert [row[0] for row in await cursor.fetchall()] == ["c1_old", "c1_mid"]
+    finally:
+        await database.close()
+
+
+
+# transaction()
+
+async def test_transaction_commits_on_exit(db):
+    async with db.transaction():
+        await db.insert_chunks([make_chunk("c1")])
+        await db.insert_chunks([make_chunk("c2")])
+
+    assert [c.chunk_id for c in await db.get_all_chunks("doc")] == ["c1", "c2"]
+
+
+async def test_transaction_rolls_back_on_error(db):
+    with pytest.raises(RuntimeError):
+        async with db.transaction():
+            await db.insert_chunks([make_chunk("c1")])
+            raise RuntimeError("boom")
+
+    assert await db.get_chunk("c1") is None
+
+
+async def test_nested_transaction_joins_outer(db):
+    with pytest.raises(RuntimeError):
+        async with db.transaction():
+            async with db.transaction():
+                await db.insert_chunks([make_chunk("inner")])
+            await db.insert_chunks([make_chunk("outer")])
+            raise RuntimeError("boom")
+
+    # The inner block did not commit on its own
+    assert await db.get_chunk("inner") is None
+    assert await db.get_chunk("outer") is None
+
+
+async def test_concurrent_write_does_not_join_another_coroutines_transaction(db):
+    inside = asyncio.Event()
+
+    async def failing_transaction():
+        with pytest.raises(RuntimeError):
+            async with db.transaction():
+                await db.insert_chunks([make_chunk("in_transaction")])
+                inside.set()
+                # Give the other coroutine time to attempt its write
+                await asyncio.sleep(0.05)
+                raise RuntimeError("boom")
+
+    async def independent_write():
+        await inside.wait()
+        await db.insert_chunks([make_chunk("independent")])
+
+    await asyncio.gather(failing_transaction(), independent_write())
+
+    assert await db.get_chunk("in_transaction") is None
+    assert await db.get_chunk("independent") is not None
+
+
+async def test_failed_write_outside_transaction_is_rolled_back(db):
+    await db.insert_chunks([make_chunk("c1")])
+    with pytest.raises(Exception):
+        # Second row violates the primary key: the whole batch is undone
+        await db.insert_chunks([make_chunk("c2"), make_chunk("c1")])
+
+    await db.insert_chunks([make_chunk("c3")])
+    assert [c.chunk_id for c in await db.get_all_chunks("doc")] == ["c1", "c3"]
@@ -0,0 +1,97 @@
+"""
+Tests for semantic chunk matching in diff mode.
+"""
+
+import difflib
+import random
+
+import fitz
+import numpy as np
+import pytest
+
+import diff_mode
+from diff_mode import DocumentDiffer
+
+
+@pytest.fixture
+def differ():
+    return DocumentDiffer({
+        'diff_mode': {'use_semantic_alignment': False},
+        'document': {'extraction_cache': False},
+    })
+
+
+@pytest.mark.skipif(diff_mode.linear_sum_assignment is None, reason="scipy not installed")
+def test_hungarian_ignores_pairs_below_threshold(differ):
+    # Max-sum on the raw matrix pairs 0->1 and 1->0, and after filtering
+    # v1[0] would lose its identical v2[0] match
+    similarities = np.array([[1.0, 0.71], [0.5, 0.0]], dtype=np.float32)
+
+    matches = differ._match_chunks(similarities)
+
+    assert matches == {0: (0, 1.0)}
+
+
+def test_greedy_fallback_ignores_pairs_below_threshold(differ, monkeypatch):
+    monkeypatch.setattr(diff_mode, 'linear_sum_assignment', None)
+    similarities = np.array([[1.0, 0.71], [0.5, 0.0]], dtype=np.float32)
+
+    matches = differ._match_chunks(similarities)
+
+    assert matches == {0: (0, 1.0)}
+
+
+def test_match_is_one_to_one(differ):
+    similarities = np.array([
+        [0.9, 0.8, 0.1],
+        [0.85, 0.75, 0.2],
+        [0.1, 0.2, 0.95],
+    ], dtype=np.float32)
+
+    matches = differ._match_chunks(similarities)
+
+    matched_v2 = [j for j, _ in matches.values()]
+    assert len(matched_v2) == len(set(matched_v2))
+    assert matches[2] == (2, pytest.approx(0.95))
+    assert all(sim >= diff_mode.SEMANTIC_MATCH_THRESHOLD for _, sim in matches.values())
+
+
+def _ratio_significance(text_v1, text_v2):
+    """Magnitude classification straight from SequenceMatcher.ratio()."""
+    return 'medium' if difflib.SequenceMatcher(None, text_v1, text_v2).ratio() < 0.5 else 'low'
+
+
+def test_significance_matches_sequence_matcher_ratio(differ):
+    # Shared prefix/suffix alone does not bound ratio() from below
+    assert differ._calculate_significance("cca", "caaaca") == 'medium'
+
+    rng = random.Random(0)
+    words = ["the", "pin", "is", "an", "input", "output", "port", "bit", "set", "clear"]
+    for _ in range(300):
+        v1 = " ".join(rng.choice(words) for _ in range(rng.randint(1, 120)))
+        start = rng.randint(0, len(v1))
+        end = rng.randint(start, len(v1))
+        inserted = " ".join(rng.choice(words) for _ in range(rng.randint(0, 40)))
+        v2 = v1[:start] + inserted + v1[end:]
+
+        assert differ._calculate_significance(v1, v2) == _ratio_significance(v1, v2)
+
+
+def _write_pdf(path, body):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "1.0 ELECTRICAL CHARACTERISTICS", fontsize=16)
+    page.insert_text((72, 120), body, fontsize=10)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_compare_documents_extracts_both_versions_in_workers(differ, tmp_path):
+    v1 = _write_pdf(tmp_path / "v1.pdf", "Maximum supply voltage is 3.6 V.")
+    v2 = _write_pdf(tmp_path / "v2.pdf", "Maximum supply voltage is 5.5 V.")
+
+    result = differ.compare_documents(v1, v2)
+
+    assert result['total_changes'] == 1
+    assert result['changes'][0].change_type == 'modified'
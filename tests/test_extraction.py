@@ -0,0 +1,40 @@
+"""
+Tests for PDF extraction.
+"""
+
+import fitz
+import pytest
+
+import extraction
+from extraction import PDFExtractor, MIN_PAGES_PER_WORKER
+
+
+@pytest.fixture
+def sample_pdf(tmp_path):
+    """A PDF long enough to be split across two extraction workers."""
+    path = tmp_path / "sample.pdf"
+    doc = fitz.open()
+    for page_num in range(2 * MIN_PAGES_PER_WORKER):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"{page_num + 1}.0 SECTION {page_num + 1}", fontsize=16)
+        page.insert_text((72, 120), f"Body text of page {page_num + 1}. See Table 1.", fontsize=10)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def extract(pdf_path: str, workers: int):
+    config = {'document': {'parallel_workers': workers, 'extraction_cache': False}}
+    return PDFExtractor(config).extract_document(pdf_path, "doc")
+
+
+async def test_parallel_extraction_with_open_database_matches_serial(sample_pdf, db, monkeypatch):
+    # The database's connection threads are alive while workers start
+    monkeypatch.setattr(extraction.os, 'cpu_count', lambda: 2)
+
+    parallel = extract(sample_pdf, workers=2)
+    serial = extract(sample_pdf, workers=1)
+
+    assert parallel == serial
+    assert [c.section_hierarchy for c in serial if c.chunk_type == 'text'][-1] == \
+        f"{2 * MIN_PAGES_PER_WORKER}.0 SECTION {2 * MIN_PAGES_PER_WORKER}"